@@ -0,0 +1,377 @@
+"""
+Offline end-to-end benchmark for website_analyzer.py.
+
+Serves a corpus of fixture sites (fast, slow, lazy-loading, never-idle and broken) and a fake
+OpenAI-compatible /v1/chat/completions endpoint from a local aiohttp server, then runs
+a website_analyzer.Analyzer against them at several concurrency settings. Nothing leaves the machine.
+
+Reports sites/sec, p50/p95/p99 latency per pipeline stage, peak RSS of the whole process tree
+(browsers and optimizer processes included), the number of API calls and, from the analyzer's
+run summary, which stage bound each run.
+
+Example:
+    python benchmark_website_analyzer.py --sites 40 --browsers 2 4 --in-flight 8 32 --api-429-rate 0.1
+"""
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from aiohttp import web
+from PIL import Image
+
+SITE_KINDS = ["fast", "slow", "lazy", "never-idle", "broken"]
+SLOW_RESPONSE_SECONDS = 2.0 # Server delay before a "slow" site's HTML is sent
+LAZY_IMAGE_DELAY_SECONDS = 0.3 # Server delay for each lazily loaded image
+LAZY_IMAGE_COUNT = 12
+NEVER_IDLE_INTERVAL_MS = 150 # How often a never-idle page fetches and mutates the DOM
+RSS_SAMPLE_INTERVAL_SECONDS = 0.25
+API_MAX_REQUEST_BYTES = 64 * 1024 * 1024 # aiohttp's 1 MiB default rejects batched or near-budget screenshots
+
+FAKE_VERDICTS = [
+    ("Modern", "Clean layout with generous whitespace and a bold hero image."),
+    ("Acceptable", "Readable typography and a simple navigation bar, though the hero feels generic."),
+    ("Outdated", "Cramped table-based layout with small fonts and low-contrast colors."),
+]
+
+def _page(title: str, body: str, hue: int, head: str = "") -> str:
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>{head}
+<style>
+  body {{ font-family: sans-serif; margin: 0; background: hsl({hue}, 40%, 96%); }}
+  header {{ background: hsl({hue}, 60%, 35%); color: white; padding: 48px; font-size: 40px; }}
+  section {{ padding: 32px 48px; min-height: 400px; border-bottom: 1px solid #ddd; }}
+</style></head>
+<body><header>{title}</header>{body}</body></html>"""
+
+class FixtureServer:
+    """
+    aiohttp app serving the fixture sites and the fake chat completions API on a background loop.
+
+    Fixture URLs look like /site/<kind>/<n>; the API lives under /v1. API behaviour (latency and
+    the share of requests answered with 429) can be changed between runs via `configure_api`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.api_latency_seconds = 0.5
+        self.api_jitter_seconds = 0.2
+        self.api_429_rate = 0.0
+        self.api_calls = 0
+        self.api_throttled = 0
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fixture-server", daemon=True)
+        self._image = self._make_image()
+
+    @staticmethod
+    def _make_image() -> bytes:
+        output = io.BytesIO()
+        Image.new("RGB", (640, 360), (120, 160, 200)).save(output, "PNG")
+        return output.getvalue()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def site_url(self, kind: str, n: int) -> str:
+        return f"{self.base_url}/site/{kind}/{n}"
+
+    def configure_api(self, latency_seconds: float, jitter_seconds: float, rate_429: float):
+        self.api_latency_seconds = latency_seconds
+        self.api_jitter_seconds = jitter_seconds
+        self.api_429_rate = rate_429
+
+    def reset_counters(self):
+        with self._lock:
+            self.api_calls = 0
+            self.api_throttled = 0
+
+    def start(self):
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        app = web.Application(client_max_size=API_MAX_REQUEST_BYTES)
+        app.router.add_get("/site/{kind}/{n}", self._site)
+        app.router.add_get("/img/{n}/{i}.png", self._lazy_image)
+        app.router.add_get("/ping", self._ping)
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    async def _site(self, request: web.Request) -> web.Response:
+        kind, n = request.match_info["kind"], int(request.match_info["n"])
+        hue = (n * 47) % 360
+        sections = "".join(f"<section><h2>Section {i}</h2><p>Fixture content {n}.{i}</p></section>" for i in range(6))
+        if kind == "fast":
+            return web.Response(text=_page(f"Fast site {n}", sections, hue), content_type="text/html")
+        if kind == "slow":
+            await asyncio.sleep(SLOW_RESPONSE_SECONDS)
+            return web.Response(text=_page(f"Slow site {n}", sections, hue), content_type="text/html")
+        if kind == "lazy":
+            images = "".join(f'<section><img loading="lazy" width="640" height="360" src="/img/{n}/{i}.png"></section>'
+                             for i in range(LAZY_IMAGE_COUNT))
+            return web.Response(text=_page(f"Lazy site {n}", images, hue), content_type="text/html")
+        if kind == "never-idle":
+            script = f"""<script>
+              setInterval(() => {{
+                fetch('/ping').catch(() => {{}});
+                const p = document.createElement('p');
+                p.textContent = new Date().toISOString();
+                document.body.appendChild(p);
+              }}, {NEVER_IDLE_INTERVAL_MS});
+            </script>"""
+            return web.Response(text=_page(f"Never-idle site {n}", sections, hue, head=script), content_type="text/html")
+        if kind == "broken":
+            return web.Response(status=500, text="<html><body><h1>Internal Server Error</h1></body></html>",
+                                content_type="text/html")
+        raise web.HTTPNotFound()
+
+    async def _lazy_image(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(LAZY_IMAGE_DELAY_SECONDS)
+        return web.Response(body=self._image, content_type="image/png")
+
+    async def _ping(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(0.3)
+        return web.Response(status=204)
+
+    async def _chat_completions(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        with self._lock:
+            self.api_calls += 1
+            throttled = random.random() < self.api_429_rate
+            if throttled:
+                self.api_throttled += 1
+        await asyncio.sleep(max(0.0, self.api_latency_seconds + random.uniform(-1, 1) * self.api_jitter_seconds))
+        if throttled:
+            return web.json_response(
+                {"error": {"message": "Rate limit exceeded (fake)", "code": 429}}, status=429,
+                headers={"retry-after": "1", "x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1s"})
+
+        texts = [part.get("text", "") for message in payload.get("messages", [])
+                 for part in (message.get("content") if isinstance(message.get("content"), list) else [])]
+        image_ids = [match for text in texts for match in re.findall(r"^Image ID: ([\w-]+)$", text, re.MULTILINE)]
+        if image_ids:
+            blocks = []
+            for image_id in image_ids:
+                category, explanation = random.choice(FAKE_VERDICTS)
+                blocks.append(f"Image ID: {image_id}\nCategory: {category}\nExplanation: {explanation}")
+            content = "\n\n".join(blocks)
+        else:
+            category, explanation = random.choice(FAKE_VERDICTS)
+            content = f"Category: {category}\nExplanation: {explanation}"
+        return web.json_response({
+            "id": f"chatcmpl-fake-{self.api_calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1000, "completion_tokens": 40, "total_tokens": 1040},
+        })
+
+def _process_tree_rss_bytes(root_pid: int) -> int:
+    """Summed RSS of `root_pid` and all its descendants (Linux /proc); falls back to this process's peak RSS."""
+    proc = Path("/proc")
+    if not proc.exists():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    children = {}
+    rss_pages = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            statm = (entry / "statm").read_text().split()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+        rss_pages[int(entry.name)] = int(statm[1])
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss_pages.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total * os.sysconf("SC_PAGE_SIZE")
+
+class RssSampler:
+    """Background thread tracking the peak RSS of this process tree while a run is in progress."""
+
+    def __init__(self, interval_seconds: float = RSS_SAMPLE_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, _process_tree_rss_bytes(os.getpid()))
+            self._stop.wait(self.interval_seconds)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+def write_fixture_csv(path: Path, server: FixtureServer, sites: int, kinds: list[str]):
+    """Input CSV in the Google Maps export shape, cycling through `kinds`."""
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["title", "website"])
+        for n in range(sites):
+            kind = kinds[n % len(kinds)]
+            writer.writerow([f"{kind} business {n}", server.site_url(kind, n)])
+
+def run_once(server: FixtureServer, workdir: Path, browsers: int, optimize_workers: int,
+             in_flight: int, batch_size: int, analyzer_args: list[str]) -> dict:
+    """Run one Analyzer with the given concurrency against the fixtures and return its measurements."""
+    from website_analyzer import Analyzer
+    from website_analyzer.cli import config_from_args, parse_args
+    from website_analyzer.results import percentile
+
+    run_name = f"b{browsers}_o{optimize_workers}_f{in_flight}"
+    journal_path = workdir / f"journal_{run_name}.jsonl"
+    summary_path = workdir / f"summary_{run_name}.json"
+    cli_args = parse_args([
+        "--input", str(workdir / "fixtures.csv"), "--output", str(workdir / f"analyzed_{run_name}.csv"),
+        "--journal", str(journal_path), "--trace", str(workdir / f"trace_{run_name}.jsonl"), "--summary", str(summary_path),
+        "--browsers", str(browsers), "--optimize-workers", str(optimize_workers), "--max-in-flight", str(in_flight),
+        "--batch-size", str(batch_size), "--no-save-screenshots",
+        "--no-verdict-cache", # Every configuration must do the same API work
+        *analyzer_args,
+    ])
+    analyzer = Analyzer(config_from_args(cli_args), base_url=f"{server.base_url}/v1", api_key="benchmark")
+
+    finished_jobs = []
+    server.reset_counters()
+    run_start = time.perf_counter()
+    with RssSampler() as rss:
+        analyzer.run(on_job=finished_jobs.append)
+    wall_seconds = time.perf_counter() - run_start
+
+    with open(journal_path, encoding="utf-8") as journal_file:
+        categories = [json.loads(line).get("aesthetic_category") for line in journal_file if line.strip()]
+    stages = {}
+    for job in finished_jobs:
+        for name, seconds in job.timings.items():
+            stages.setdefault(name, []).append(seconds)
+    run_summary = json.loads(summary_path.read_text(encoding="utf-8")) if summary_path.exists() else {}
+    return {
+        "browsers": browsers,
+        "optimize_workers": optimize_workers,
+        "in_flight": in_flight,
+        "batch_size": batch_size,
+        "rows": len(categories),
+        "sites_captured": len(finished_jobs),
+        "errors": sum(1 for category in categories if category == "Error"),
+        "wall_seconds": round(wall_seconds, 3),
+        "sites_per_second": round(len(categories) / wall_seconds, 3) if wall_seconds else 0.0,
+        "stages": {name: {"p50": round(percentile(values, 50), 3), "p95": round(percentile(values, 95), 3),
+                          "p99": round(percentile(values, 99), 3), "count": len(values)}
+                   for name, values in stages.items()},
+        "settled_by": run_summary.get("settled_by", {}),
+        "utilization": {name: stage["utilization"] for name, stage in run_summary.get("stages", {}).items()
+                        if "utilization" in stage},
+        "bound_by": run_summary.get("bound_by"),
+        "peak_rss_mb": round(rss.peak_bytes / (1024 * 1024), 1),
+        "api_calls": server.api_calls,
+        "api_throttled": server.api_throttled,
+    }
+
+def print_report(results: list[dict]):
+    print("\n" + "=" * 100)
+    print(f"{'browsers':>8} {'optim':>5} {'flight':>6} {'batch':>5} {'rows':>5} {'err':>4} {'sites/s':>8} "
+          f"{'rss MB':>8} {'api':>5} {'429':>4} {'bound by':>9}  stage p50/p95/p99 (s)")
+    print("-" * 100)
+    for result in results:
+        stage_summary = "  ".join(f"{name} {stats['p50']:.2f}/{stats['p95']:.2f}/{stats['p99']:.2f}"
+                                  for name, stats in result["stages"].items())
+        print(f"{result['browsers']:>8} {result['optimize_workers']:>5} {result['in_flight']:>6} {result['batch_size']:>5} "
+              f"{result['rows']:>5} {result['errors']:>4} {result['sites_per_second']:>8.2f} {result['peak_rss_mb']:>8.1f} "
+              f"{result['api_calls']:>5} {result['api_throttled']:>4} {result['bound_by'] or '-':>9}  {stage_summary}")
+    print("=" * 100)
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark for website_analyzer.py.")
+    parser.add_argument("--sites", type=int, default=25, help="Fixture sites in the input CSV (default: %(default)s)")
+    parser.add_argument("--kinds", nargs="+", choices=SITE_KINDS, default=SITE_KINDS,
+                        help="Fixture kinds to cycle through (default: all)")
+    parser.add_argument("--browsers", type=int, nargs="+", default=[2, 4], help="Browser pool sizes to try")
+    parser.add_argument("--optimize-workers", type=int, nargs="+", default=[2], help="Optimizer process counts to try")
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[8, 32], help="Max in-flight API requests to try")
+    parser.add_argument("--batch-size", type=int, default=1, help="Screenshots per API request (default: %(default)s)")
+    parser.add_argument("--api-latency", type=float, default=0.5, help="Fake API latency in seconds (default: %(default)s)")
+    parser.add_argument("--api-jitter", type=float, default=0.2, help="Fake API latency jitter in seconds (default: %(default)s)")
+    parser.add_argument("--api-429-rate", type=float, default=0.0,
+                        help="Share of fake API requests answered with 429 (default: %(default)s)")
+    parser.add_argument("--workdir", type=Path, default=None, help="Where inputs, outputs and logs go (default: a temp dir)")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the analyzer's INFO logging")
+    parser.add_argument("analyzer_args", nargs=argparse.REMAINDER,
+                        help="Extra website_analyzer CLI flags, after '--' (e.g. -- --capture-profile lean)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    analyzer_args = [arg for arg in args.analyzer_args if arg != "--"]
+    workdir = (args.workdir or Path(tempfile.mkdtemp(prefix="website_analyzer_bench_"))).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    json_path = args.json.resolve() if args.json else None
+    server = FixtureServer().start()
+    print(f"Fixture server on {server.base_url}; working in {workdir}")
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from website_analyzer.logs import configure_logging
+    configure_logging(str(workdir / "website_analyzer.log"), logging.INFO if args.verbose else logging.WARNING)
+    write_fixture_csv(workdir / "fixtures.csv", server, args.sites, args.kinds)
+    server.configure_api(args.api_latency, args.api_jitter, args.api_429_rate)
+
+    results = []
+    try:
+        for browsers, optimize_workers, in_flight in itertools.product(args.browsers, args.optimize_workers, args.in_flight):
+            print(f"Running: {browsers} browsers, {optimize_workers} optimizer processes, {in_flight} requests in flight...")
+            result = run_once(server, workdir, browsers, optimize_workers, in_flight, args.batch_size, analyzer_args)
+            print(f"  {result['rows']} rows in {result['wall_seconds']:.1f}s ({result['sites_per_second']:.2f} sites/s), "
+                  f"{result['api_calls']} API calls, peak RSS {result['peak_rss_mb']:.0f} MB")
+            results.append(result)
+    finally:
+        server.close()
+
+    print_report(results)
+    if json_path:
+        json_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Results written to {json_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Hashtag inverted index over TikTok and Instagram exports.
+
+`build` scans the exports once and writes an index mapping every hashtag to its posts, with
+per-tag counts, sums and quantiles of plays and diggs (Instagram likes count as diggs) and the
+tag's posts pre-ranked by each metric. `top` and `stats` answer from the index alone.
+
+Usage:
+    python index_hashtags.py build [exports...]
+    python index_hashtags.py top eldercare --k 10 --by diggs
+    python index_hashtags.py stats --sort plays_p50 --min-count 3
+"""
+
+import argparse
+import json
+import math
+import re
+from pathlib import Path
+
+from sort_json_by_playcount import load_export_items, write_atomic
+
+DEFAULT_INPUTS = ["content/top-250-tt.json", "content/instagram_data.json"]
+DEFAULT_INDEX = "content/hashtag_index.json"
+INDEX_VERSION = 1
+METRICS = ["plays", "diggs"]
+QUANTILES = [25, 50, 75, 90] # Percentiles stored per tag and metric
+STATS_SORT_KEYS = ["count"] + [f"{metric}_{stat}" for metric in METRICS for stat in ["sum", "p50", "p90", "max"]]
+CAPTION_HASHTAG = re.compile(r"#(\w+)")
+TEXT_PREVIEW_CHARS = 120
+
+def percentile(values, pct):
+    """Nearest-rank percentile of already sorted values; None for an empty list."""
+    if not values:
+        return None
+    return values[max(1, math.ceil(len(values) * pct / 100)) - 1]
+
+def item_record(item):
+    """
+    Normalize a TikTok or Instagram item to (id, record, hashtags).
+
+    TikTok items carry playCount/diggCount and `hashtags` as objects with a 'name'; Instagram
+    posts carry likesCount (stored as diggs), an optional video play count and `hashtags` as
+    strings. Tags from the caption text are added to the field's tags; all tags are lowercased.
+    """
+    is_tiktok = 'playCount' in item or 'diggCount' in item or 'webVideoUrl' in item
+    text = item.get('text') if is_tiktok else item.get('caption')
+    tags = set()
+    for tag in item.get('hashtags') or []:
+        name = tag.get('name') if isinstance(tag, dict) else tag
+        if isinstance(name, str) and name.strip():
+            tags.add(name.strip().lstrip('#').casefold())
+    tags.update(tag.casefold() for tag in CAPTION_HASHTAG.findall(text or ""))
+
+    if is_tiktok:
+        plays, diggs = item.get('playCount'), item.get('diggCount')
+        url = item.get('webVideoUrl')
+        author = item.get('authorMeta.name') or (item.get('authorMeta') or {}).get('name')
+    else:
+        plays = item.get('videoPlayCount', item.get('videoViewCount'))
+        diggs = item.get('likesCount')
+        url = item.get('url')
+        author = item.get('ownerUsername')
+    item_id = str(item.get('id') or item.get('shortCode') or url)
+    record = {
+        "source": "tiktok" if is_tiktok else "instagram",
+        "url": url,
+        "author": author,
+        "plays": plays if isinstance(plays, (int, float)) else None,
+        "diggs": diggs if isinstance(diggs, (int, float)) else None,
+        "text": (text or "")[:TEXT_PREVIEW_CHARS],
+    }
+    return item_id, record, tags
+
+def build_index(input_files, index_file=DEFAULT_INDEX):
+    """
+    Scan the exports once and write the hashtag index.
+
+    Args:
+        input_files (list): TikTok exports ({"items": [...]}) and/or Instagram exports (lists of posts)
+        index_file (str): Where to write the index
+
+    Returns:
+        dict: The index that was written.
+    """
+    items, item_tags, sources = {}, {}, []
+    for input_file in input_files:
+        print(f"Reading {input_file}...")
+        export_items = load_export_items(input_file)
+        stat = Path(input_file).stat()
+        sources.append({"path": str(input_file), "items": len(export_items),
+                        "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+        for item in export_items:
+            item_id, record, tags = item_record(item)
+            # A post seen in several exports keeps its latest metrics and tags; tags edited away are dropped
+            items[item_id] = record
+            item_tags[item_id] = tags
+        print(f"Indexed {len(export_items):,} items from {input_file}")
+
+    postings = {}
+    for item_id, tags in item_tags.items():
+        for tag in tags:
+            postings.setdefault(tag, set()).add(item_id)
+
+    tags = {}
+    for tag, item_ids in postings.items():
+        entry = {"count": len(item_ids)}
+        for metric in METRICS:
+            values = sorted(items[item_id][metric] for item_id in item_ids if items[item_id][metric] is not None)
+            entry[metric] = {
+                "n": len(values),
+                "sum": sum(values),
+                "max": values[-1] if values else None,
+                **{f"p{pct}": percentile(values, pct) for pct in QUANTILES},
+            }
+            # Posts without the metric rank last; ties keep id order so rebuilds are stable
+            ranked = sorted(item_ids, key=lambda item_id: (items[item_id][metric] is None, -(items[item_id][metric] or 0), item_id))
+            entry[f"top_by_{metric}"] = ranked
+        tags[tag] = entry
+
+    index = {
+        "version": INDEX_VERSION,
+        "sources": sources,
+        "items": items,
+        "tags": dict(sorted(tags.items(), key=lambda pair: (-pair[1]["count"], pair[0]))),
+    }
+    write_atomic(index_file, json.dumps(index, ensure_ascii=False))
+    print(f"\n✅ Indexed {len(tags):,} hashtags over {len(items):,} posts into {index_file}")
+    empty = [source["path"] for source in sources if source["items"] == 0]
+    if empty:
+        print(f"Note: no items found in {', '.join(empty)}")
+    return index
+
+def load_index(index_file=DEFAULT_INDEX):
+    with open(index_file, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get("version") != INDEX_VERSION:
+        raise ValueError(f"{index_file} was built by a different version; run 'build' again")
+    for source in index["sources"]:
+        path = Path(source["path"])
+        if path.exists() and path.stat().st_mtime_ns != source["mtime_ns"]:
+            print(f"Warning: {path} changed since the index was built; run 'build' to refresh it")
+    return index
+
+def top_posts(index, tag, k=10, by="plays"):
+    """The top `k` posts for `tag` by plays or diggs, from the index's pre-ranked postings."""
+    entry = index["tags"].get(tag.lstrip('#').casefold())
+    if entry is None:
+        return None, []
+    return entry, [{"id": item_id, **index["items"][item_id]} for item_id in entry[f"top_by_{by}"][:k]]
+
+def tag_stats(index, sort="count", min_count=1, limit=20):
+    """Per-tag aggregate rows sorted by `sort` ('count', or e.g. 'plays_p50', 'diggs_sum'), highest first."""
+    rows = []
+    for tag, entry in index["tags"].items():
+        if entry["count"] < min_count:
+            continue
+        row = {"tag": tag, "count": entry["count"]}
+        for metric in METRICS:
+            for stat in ["sum", "p50", "p90", "max"]:
+                row[f"{metric}_{stat}"] = entry[metric][stat]
+        rows.append(row)
+    rows.sort(key=lambda row: (row.get(sort) is None, -(row.get(sort) or 0), row["tag"]))
+    return rows[:limit] if limit else rows
+
+def format_number(value):
+    return "-" if value is None else f"{value:,.0f}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query a hashtag index over TikTok and Instagram exports.")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help=f"Index file (default: {DEFAULT_INDEX})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Scan exports and (re)write the index")
+    build.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help=f"Exports to index (default: {' '.join(DEFAULT_INPUTS)})")
+    top = commands.add_parser("top", help="Top posts for one hashtag")
+    top.add_argument("tag", help="Hashtag, with or without '#'")
+    top.add_argument("--k", type=int, default=10, help="Number of posts (default: 10)")
+    top.add_argument("--by", choices=METRICS, default="plays", help="Rank by plays or diggs/likes (default: plays)")
+    top.add_argument("--json", action="store_true", help="Print the result as JSON")
+    stats = commands.add_parser("stats", help="Aggregate stats per hashtag")
+    stats.add_argument("--sort", choices=STATS_SORT_KEYS, default="count", metavar="KEY",
+                       help="count, or <plays|diggs>_<sum|p50|p90|max> (default: count)")
+    stats.add_argument("--min-count", type=int, default=1, help="Skip tags on fewer posts (default: 1)")
+    stats.add_argument("--limit", type=int, default=20, help="Rows to show; 0 for all (default: 20)")
+    stats.add_argument("--json", action="store_true", help="Print the rows as JSON")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            build_index(args.inputs, args.index)
+            return 0
+        index = load_index(args.index)
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found" + (" (run 'build' first)" if e.filename == args.index else ""))
+        return 1
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    if args.command == "top":
+        entry, posts = top_posts(index, args.tag, args.k, args.by)
+        if entry is None:
+            print(f"No posts tagged #{args.tag.lstrip('#')}")
+            return 1
+        if args.json:
+            print(json.dumps({"tag": args.tag.lstrip('#').casefold(), "count": entry["count"], "posts": posts},
+                             indent=2, ensure_ascii=False))
+            return 0
+        print(f"#{args.tag.lstrip('#').casefold()}: {entry['count']} posts, median plays {format_number(entry['plays']['p50'])}, "
+              f"median diggs {format_number(entry['diggs']['p50'])}")
+        for rank, post in enumerate(posts, 1):
+            print(f"{rank:>3}. {format_number(post['plays']):>12} plays {format_number(post['diggs']):>10} diggs  "
+                  f"[{post['source']}] {post['url']}")
+        return 0
+
+    rows = tag_stats(index, args.sort, args.min_count, args.limit)
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return 0
+    print(f"{'tag':<30} {'posts':>6} {'plays p50':>12} {'plays sum':>14} {'diggs p50':>10} {'diggs sum':>12}")
+    for row in rows:
+        print(f"{'#' + row['tag']:<30} {row['count']:>6} {format_number(row['plays_p50']):>12} "
+              f"{format_number(row['plays_sum']):>14} {format_number(row['diggs_p50']):>10} {format_number(row['diggs_sum']):>12}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
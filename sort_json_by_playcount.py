@@ -1,13 +1,154 @@
 #!/usr/bin/env python3
 """
 Script to sort TikTok JSON data by playCount and optionally filter top X posts.
+
+Run without arguments for the interactive menu, or non-interactively over many exports:
+
+    python sort_json_by_playcount.py "exports/*.json" --cutoffs 10 25 50 --format ndjson --output-dir out/
 """
 
+import argparse
+import glob
+import heapq
 import json
+import os
+import re
+import stat
 import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-def sort_and_filter_json(input_file, output_file=None, ascending=False, top_x=None):
+STREAM_CHUNK_SIZE = 1024 * 1024 # Characters read at a time when streaming an export
+DEFAULT_TOP_COUNTS = [10, 25, 50, 100, 250] # Cutoffs written by create_top_x_versions()
+OUTPUT_FORMATS = ["indent", "compact", "ndjson"] # indent matches the interactive script's indent=2 output
+BATCH_OUTPUT_NAME = re.compile(r"-(top-\d+|sorted)\.(json|ndjson)$") # What process_export() names its outputs
+# Top-level playCount and id lines of an item in an indent=2 'items' array (see scan_ranked_items)
+RANKED_PLAY_COUNT_PATTERN = re.compile(rb'\n      "playCount": ([^\n]*)')
+RANKED_ID_PATTERN = re.compile(rb'\n      "id": ([^\n]*)')
+
+class JSONStream:
+    """
+    Incremental reader for one JSON document: decodes a value at a time with raw_decode(),
+    holding only the unread part of the current chunk (plus the value being decoded) in memory.
+    """
+
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.offset = 0 # Characters of the file before self.buffer
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def tell(self):
+        """Characters consumed so far (bytes, for a file opened as latin-1)."""
+        return self.offset + self.pos
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ('' at the end of the file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number that ends exactly at the chunk boundary may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def array(self):
+        """Yield the elements of the JSON array at the current position, one at a time."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect(']')
+                return
+
+def stream_items(input_file, select):
+    """
+    Parse a `{"items": [...], ...}` export without loading every item at once.
+
+    Args:
+        input_file (str): Path to input JSON file
+        select (callable): Called with an iterator over the items; returns the items to keep.
+
+    Returns:
+        tuple: (data, item_count). `data` has the file's top-level keys in their original order,
+        with 'items' replaced by what `select` returned; it is None if the file has no 'items' array.
+    """
+    data, counter = {}, [0]
+
+    def counted(items):
+        for item in items:
+            counter[0] += 1
+            yield item
+
+    with open(input_file, 'r', encoding='utf-8') as f:
+        stream = JSONStream(f)
+        if stream.peek() != '{':
+            return None, 0
+        stream.expect('{')
+        while stream.peek() != '}':
+            key = stream.value()
+            stream.expect(':')
+            if key == 'items' and stream.peek() == '[':
+                data[key] = select(counted(stream.array()))
+            else:
+                data[key] = stream.value()
+            if stream.peek() == ',':
+                stream.pos += 1
+        stream.expect('}')
+        if stream.peek():
+            raise json.JSONDecodeError("Extra data", stream.buffer, stream.pos)
+    if not isinstance(data.get('items'), list):
+        return None, counter[0]
+    return data, counter[0]
+
+def top_items(items, top_x, ascending=False, sort_key='playCount'):
+    """
+    The first `top_x` items of the `sort_key` ranking, keeping only a heap of `top_x` items in memory.
+    Ties keep their file order, so this matches a stable sort followed by [:top_x].
+    """
+    select = heapq.nsmallest if ascending else heapq.nlargest
+    return select(top_x, items, key=lambda x: x.get(sort_key, 0))
+
+def sort_and_filter_json(input_file, output_file=None, ascending=False, top_x=None, streaming=True):
     """
     Sort JSON items by playCount field and optionally filter top X posts.
     
@@ -16,32 +157,43 @@ def sort_and_filter_json(input_file, output_file=None, ascending=False, top_x=No
         output_file (str, optional): Path to output file. If None, overwrites input file.
         ascending (bool): If True, sort in ascending order. Default is descending.
         top_x (int, optional): If provided, only keep top X posts after sorting.
+        streaming (bool): With top_x, parse items incrementally and keep only the top X in
+            memory instead of loading and sorting the whole export. The output is identical.
     """
     try:
-        # Read the JSON file
-        print(f"Reading {input_file}...")
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Check if the expected structure exists
-        if 'items' not in data:
-            print("Error: JSON file does not contain 'items' array")
-            return False
-        
-        original_count = len(data['items'])
-        print(f"Found {original_count} items to sort")
-        
-        # Sort the items by playCount
-        print("Sorting by playCount...")
-        data['items'].sort(key=lambda x: x.get('playCount', 0), reverse=not ascending)
+        if streaming and top_x and top_x > 0:
+            # Stream the items through a bounded heap: O(top_x) memory, O(N log top_x) time
+            print(f"Streaming {input_file} for the top {top_x} by playCount...")
+            data, original_count = stream_items(input_file, lambda items: top_items(items, top_x, ascending))
+            if data is None:
+                print("Error: JSON file does not contain 'items' array")
+                return False
+            print(f"Found {original_count} items, kept {len(data['items'])}")
+        else:
+            # Read the JSON file
+            print(f"Reading {input_file}...")
+            with open(input_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            # Check if the expected structure exists
+            if 'items' not in data:
+                print("Error: JSON file does not contain 'items' array")
+                return False
+            
+            original_count = len(data['items'])
+            print(f"Found {original_count} items to sort")
+            
+            # Sort the items by playCount
+            print("Sorting by playCount...")
+            data['items'].sort(key=lambda x: x.get('playCount', 0), reverse=not ascending)
         
         # Filter top X if requested
         if top_x and top_x > 0:
-            if top_x < len(data['items']):
+            if top_x < original_count:
                 print(f"Filtering to top {top_x} posts...")
                 data['items'] = data['items'][:top_x]
             else:
-                print(f"Requested {top_x} posts, but only {len(data['items'])} available. Keeping all posts.")
+                print(f"Requested {top_x} posts, but only {original_count} available. Keeping all posts.")
         
         # Determine output file
         if output_file is None:
@@ -82,30 +234,425 @@ def sort_and_filter_json(input_file, output_file=None, ascending=False, top_x=No
         print(f"Error: {e}")
         return False
 
-def create_top_x_versions(input_file, base_output_name="content/top-"):
+def write_atomic(output_file, text):
+    """Write `text` (str or bytes) to a temp file next to `output_file`, then rename it over the target in one step."""
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    temp_file = os.path.join(output_dir, f".{os.path.basename(output_file)}.{uuid.uuid4().hex}.tmp")
+    # Created 0666 so the kernel applies the umask as for any new file; an existing target keeps its mode
+    fd = os.open(temp_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    try:
+        with (os.fdopen(fd, 'wb') if isinstance(text, bytes) else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(temp_file, stat.S_IMODE(os.stat(output_file).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(temp_file, output_file)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.unlink(temp_file)
+        raise
+
+def encode_items(items):
+    """Encode each item once, exactly as json.dump(data, indent=2) lays it out inside data['items']."""
+    return ["    " + json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n    ") for item in items]
+
+def render_with_items(data, encoded_items):
+    """
+    The text json.dump(data, indent=2, ensure_ascii=False) would write if data['items'] held the items
+    behind `encoded_items`, built from the pre-encoded items instead of re-encoding them.
+    Items pre-encoded as UTF-8 bytes give the file's bytes instead.
     """
-    Create multiple filtered versions with different top X counts.
+    marker = f"items-{uuid.uuid4().hex}"
+    skeleton = json.dumps({**data, 'items': marker}, indent=2, ensure_ascii=False)
+    if encoded_items and isinstance(encoded_items[0], bytes):
+        head, tail = skeleton.encode('utf-8').split(json.dumps(marker).encode('utf-8'), 1)
+        return head + b"[\n" + b",\n".join(encoded_items) + b"\n  ]" + tail
+    items_text = "[\n" + ",\n".join(encoded_items) + "\n  ]" if encoded_items else "[]"
+    return skeleton.replace(json.dumps(marker), items_text, 1)
+
+def create_top_x_versions(input_file, base_output_name="content/top-", top_counts=None, ascending=False):
+    """
+    Create multiple filtered versions with different top X counts in a single pass.
+    
+    The export is parsed and ranked once, up to the largest cutoff, and every item of that ranked
+    prefix is encoded once; each file is then assembled from the shared prefix and written
+    concurrently and atomically. The files are identical to what sort_and_filter_json() writes.
     
     Args:
         input_file (str): Path to input JSON file
         base_output_name (str): Base name for output files
+        top_counts (list, optional): Cutoffs to write. Defaults to DEFAULT_TOP_COUNTS.
+        ascending (bool): If True, keep the lowest play counts instead of the highest.
+    
+    Returns:
+        dict: Output file name -> True if it was written.
     """
-    # Common top X values that might be useful
-    top_counts = [10, 25, 50, 100, 250]
+    top_counts = sorted(set(top_counts or DEFAULT_TOP_COUNTS))
+    output_files = {count: f"{base_output_name}{count}-tt.json" for count in top_counts}
     
     print("\nCreating multiple top X versions...")
     print("=" * 40)
     
-    for count in top_counts:
-        output_file = f"{base_output_name}{count}-tt.json"
-        print(f"\nCreating top {count} version...")
+    try:
+        start_time = time.perf_counter()
+        print(f"Streaming {input_file} for the top {top_counts[-1]} by playCount...")
+        data, original_count = stream_items(input_file, lambda items: top_items(items, top_counts[-1], ascending))
+        if data is None:
+            print("Error: JSON file does not contain 'items' array")
+            return {output_file: False for output_file in output_files.values()}
+        rank_seconds = time.perf_counter() - start_time
+        
+        encode_start_time = time.perf_counter()
+        encoded_items = encode_items(data['items'])
+        texts = {count: render_with_items(data, encoded_items[:count]) for count in top_counts}
+        encode_seconds = time.perf_counter() - encode_start_time
+    except FileNotFoundError:
+        print(f"Error: File '{input_file}' not found")
+        return {output_file: False for output_file in output_files.values()}
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON format - {e}")
+        return {output_file: False for output_file in output_files.values()}
+    
+    write_start_time = time.perf_counter()
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(top_counts)) as executor:
+        futures = {count: executor.submit(write_atomic, output_files[count], texts[count]) for count in top_counts}
+        for count, future in futures.items():
+            output_file = output_files[count]
+            try:
+                future.result()
+                results[output_file] = True
+                print(f"✅ Created: {output_file} ({min(count, original_count)} of {original_count} posts)")
+            except Exception as e:
+                results[output_file] = False
+                print(f"❌ Failed to create: {output_file} - {e}")
+    write_seconds = time.perf_counter() - write_start_time
+    
+    # Extrapolated, not timed: the per-cutoff path parses and ranks once per file and encodes every kept item again for each file
+    total_seconds = time.perf_counter() - start_time
+    encoded_per_item = encode_seconds / max(1, len(encoded_items))
+    per_cutoff_seconds = (len(top_counts) * rank_seconds
+                          + sum(min(count, len(encoded_items)) for count in top_counts) * encoded_per_item
+                          + write_seconds)
+    print(f"\nSingle pass took {total_seconds:.2f}s (parse and rank {rank_seconds:.2f}s, encode {encode_seconds:.2f}s, "
+          f"write {write_seconds:.2f}s)")
+    print(f"Estimated (not measured) time for one pass per cutoff: {per_cutoff_seconds:.2f}s, extrapolated from the "
+          f"timings above; estimated saving about {max(0.0, per_cutoff_seconds - total_seconds):.2f}s")
+    return results
+
+def parse_top_counts(text, default=None):
+    """Parse cutoffs like '10, 25, 50' into a list of positive integers; `default` for empty input."""
+    if not text.strip():
+        return default
+    counts = [int(part) for part in text.replace(",", " ").split()]
+    if any(count <= 0 for count in counts):
+        raise ValueError("cutoffs must be positive")
+    return counts
+
+def load_export_items(input_file):
+    """Items of an export: the 'items' array of an object export, or the export itself if it is a list."""
+    with open(input_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    items = data if isinstance(data, list) else data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise ValueError(f"{input_file} does not contain an 'items' array")
+    return items
+
+def scan_ranked_items(ranked_file):
+    """
+    Ranked items of a file this script wrote (indent=2 layout) as (playCount, id, item bytes)
+    triples, without decoding the items: each item is found by its closing brace at four spaces of
+    indent and only its top-level 'playCount' and 'id' lines are parsed. JSON strings cannot hold
+    raw newlines, so only the item's own keys start a line with six spaces of indent.
+    
+    Returns:
+        tuple: (data, triples), with data['items'] empty. (None, None) if the file is in another layout.
+    """
+    with open(ranked_file, 'rb') as f:
+        raw = f.read()
+    items_start = raw.find(b'\n  "items": [')
+    if items_start < 0:
+        return None, None
+    items_start += len(b'\n  "items": ')
+    bounds = []
+    if raw.startswith(b'[]', items_start):
+        items_end = items_start + 2
+    else:
+        items_end = raw.find(b'\n  ]', items_start) + len(b'\n  ]')
+        position, last = items_start + len(b'[\n'), items_end - len(b'\n  ]')
+        while position < last:
+            close = raw.find(b'\n    }', position, last)
+            end = close + len(b'\n    }')
+            # The items must tile the array exactly, or the layout is not ours
+            if close < 0 or not raw.startswith(b'    {\n', position) or (end != last and raw[end:end + 2] != b',\n'):
+                return None, None
+            bounds.append((position, end))
+            position = end + len(b',\n')
+        if not bounds:
+            return None, None
+    try:
+        data = json.loads(raw[:items_start] + b'[]' + raw[items_end:])
+        triples = []
+        for start, end in bounds:
+            play_count = RANKED_PLAY_COUNT_PATTERN.search(raw, start, end)
+            item_id = RANKED_ID_PATTERN.search(raw, start, end)
+            triples.append((json.loads(play_count.group(1).removesuffix(b',')) if play_count else 0,
+                            json.loads(item_id.group(1).removesuffix(b',')) if item_id else None, raw[start:end]))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None, None
+    return (data, triples) if isinstance(data, dict) else (None, None)
+
+def merge_exports(ranked_file, new_files, output_file=None, ascending=False, top_x=None):
+    """
+    Merge new scraper exports into an already ranked file without re-sorting it.
+    
+    Items are deduplicated by 'id': a later export's copy replaces an earlier one and the ranked
+    file's copy, so the latest metrics win. Only the new items are sorted; they are then merged
+    with the ranked items in one linear heapq.merge pass. Ties keep the ranked file's items first,
+    so the result is what a full stable re-sort of the combined items would give.
+    
+    A ranked file in this script's indent=2 layout is never decoded: scan_ranked_items() reads only
+    each item's playCount and id and the item text is copied through untouched, so only the new
+    items are parsed and encoded. Reading and rewriting the file is still linear in its size.
+    
+    Args:
+        ranked_file (str): Path to a JSON file whose 'items' are already sorted by playCount
+        new_files (list): Paths to new exports (an object with 'items', or a plain list of items)
+        output_file (str, optional): Path to output file. If None, overwrites ranked_file.
+        ascending (bool): Order of ranked_file and of the result. Default is descending.
+        top_x (int, optional): If provided, only keep top X posts after merging.
+    """
+    try:
+        start_time = time.perf_counter()
+        print(f"Reading {ranked_file}...")
+        data, ranked = scan_ranked_items(ranked_file)
+        if data is None:
+            # Another layout: decode the items and re-encode them in ours
+            data, _ = stream_items(ranked_file, list)
+            if data is None:
+                print("Error: JSON file does not contain 'items' array")
+                return False
+            ranked = [(item.get('playCount', 0), item.get('id'), encoded.encode('utf-8'))
+                      for item, encoded in zip(data['items'], encode_items(data['items']))]
+        data['items'] = []
+        ranked_count = len(ranked)
+        
+        # Latest copy of each new item wins; items without an id can't be matched, so they are all kept
+        new_by_id = {}
+        unmatched = []
+        new_count = 0
+        for new_file in new_files:
+            items = load_export_items(new_file)
+            new_count += len(items)
+            print(f"Read {len(items):,} items from {new_file}")
+            for item in items:
+                item_id = item.get('id')
+                if item_id is None:
+                    unmatched.append(item)
+                else:
+                    new_by_id.pop(item_id, None)
+                    new_by_id[item_id] = item
+        new_items = list(new_by_id.values()) + unmatched
         
-        success = sort_and_filter_json(input_file, output_file, ascending=False, top_x=count)
+        # (playCount, id, item as UTF-8 bytes in the indent=2 layout) triples
+        ranked = [entry for entry in ranked if entry[1] is None or entry[1] not in new_by_id]
+        replaced_count = ranked_count - len(ranked)
         
-        if success:
-            print(f"✅ Created: {output_file}")
+        key = lambda entry: entry[0]
+        in_order = all(key(a) <= key(b) if ascending else key(a) >= key(b) for a, b in zip(ranked, ranked[1:]))
+        if not in_order:
+            # Not ranked (or ranked the other way): fall back to sorting everything once
+            print(f"Warning: {ranked_file} is not sorted by playCount ({'ascending' if ascending else 'descending'}); re-sorting it")
+            ranked.sort(key=key, reverse=not ascending)
+        
+        print(f"Merging {len(new_items):,} new or updated items into {len(ranked):,} ranked items...")
+        new_ranked = sorted(((item.get('playCount', 0), item.get('id'), encoded.encode('utf-8'))
+                             for item, encoded in zip(new_items, encode_items(new_items))), key=key, reverse=not ascending)
+        merged = list(heapq.merge(ranked, new_ranked, key=key, reverse=not ascending))
+        
+        total_count = len(merged)
+        if top_x and top_x > 0 and top_x < total_count:
+            print(f"Filtering to top {top_x} posts...")
+            merged = merged[:top_x]
+        # Keep the export's bookkeeping in step with the merged items
+        if 'total' in data:
+            data['total'] = total_count
+        if 'count' in data:
+            data['count'] = len(merged)
+        if 'desc' in data:
+            data['desc'] = not ascending
+        
+        if output_file is None:
+            output_file = ranked_file
+        print(f"Writing merged data to {output_file}...")
+        write_atomic(output_file, render_with_items(data, [text for _, _, text in merged]))
+        
+        print(f"\nMerge complete in {time.perf_counter() - start_time:.2f}s!")
+        print(f"New items read: {new_count:,} ({new_count - len(new_items):,} duplicates within the new exports)")
+        print(f"Updated items: {replaced_count:,}")
+        print(f"Added items: {len(new_items) - replaced_count:,}")
+        print(f"Final items: {len(merged):,} of {total_count:,}")
+        return True
+        
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found")
+        return False
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON format - {e}")
+        return False
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+def render_cutoffs(data, items, cutoffs, output_format="indent"):
+    """
+    Output text for each cutoff (None = all items) in `output_format`, encoding every item only once.
+    'indent' and 'compact' keep the export's metadata; 'ndjson' writes one item per line.
+    """
+    if output_format == "indent":
+        encoded = encode_items(items)
+        return {cutoff: render_with_items(data, encoded[:cutoff]) for cutoff in cutoffs}
+    if output_format == "compact":
+        encoded = [json.dumps(item, ensure_ascii=False, separators=(",", ":")) for item in items]
+        marker = f"items-{uuid.uuid4().hex}"
+        skeleton = json.dumps({**data, 'items': marker}, ensure_ascii=False, separators=(",", ":"))
+        return {cutoff: skeleton.replace(json.dumps(marker), "[" + ",".join(encoded[:cutoff]) + "]", 1) for cutoff in cutoffs}
+    encoded = [json.dumps(item, ensure_ascii=False) + "\n" for item in items]
+    return {cutoff: "".join(encoded[:cutoff]) for cutoff in cutoffs}
+
+def process_export(input_file, output_dir=None, sort_key='playCount', ascending=False, cutoffs=None, output_format="indent"):
+    """
+    Sort one export and write one file per cutoff, without printing. Runs in the batch process pool.
+    
+    Args:
+        input_file (str): Path to input JSON file
+        output_dir (str, optional): Directory for the outputs. Defaults to the input's directory.
+        sort_key (str): Item field to rank by; missing values count as 0.
+        ascending (bool): If True, sort in ascending order. Default is descending.
+        cutoffs (list, optional): Top X counts to write; without them one fully sorted file is written.
+        output_format (str): One of OUTPUT_FORMATS.
+    
+    Returns:
+        dict: Per-file summary with item counts, output paths and timing, or an 'error'.
+    """
+    start_time = time.perf_counter()
+    summary = {"input": str(input_file), "items": None, "outputs": []}
+    try:
+        reverse = not ascending
+        if cutoffs:
+            cutoffs = sorted(set(cutoffs))
+            select = lambda items: top_items(items, cutoffs[-1], ascending, sort_key)
         else:
-            print(f"❌ Failed to create: {output_file}")
+            cutoffs = [None]
+            select = lambda items: sorted(items, key=lambda x: x.get(sort_key, 0), reverse=reverse)
+        data, summary["items"] = stream_items(input_file, select)
+        if data is None:
+            raise ValueError("JSON file does not contain 'items' array")
+        
+        input_path = Path(input_file)
+        output_path = Path(output_dir) if output_dir else input_path.parent
+        output_path.mkdir(parents=True, exist_ok=True)
+        extension = ".ndjson" if output_format == "ndjson" else ".json"
+        for cutoff, text in render_cutoffs(data, data['items'], cutoffs, output_format).items():
+            name = f"{input_path.stem}-top-{cutoff}{extension}" if cutoff else f"{input_path.stem}-sorted{extension}"
+            write_atomic(output_path / name, text)
+            summary["outputs"].append({"path": str(output_path / name), "count": len(data['items'][:cutoff])})
+    except FileNotFoundError:
+        summary["error"] = f"File '{input_file}' not found"
+    except json.JSONDecodeError as e:
+        summary["error"] = f"Invalid JSON format - {e}"
+    except Exception as e:
+        summary["error"] = str(e)
+    summary["seconds"] = round(time.perf_counter() - start_time, 3)
+    return summary
+
+def expand_inputs(patterns):
+    """
+    Files matching each glob (or the literal path, if it matches nothing), in order and without repeats.
+    Glob matches skip batch outputs, so re-running a glob over a folder with earlier outputs doesn't sort them again.
+    """
+    input_files = []
+    for pattern in patterns:
+        is_glob = any(char in pattern for char in "*?[")
+        found = sorted(glob.glob(pattern, recursive=True))
+        matches = [match for match in found if not (is_glob and BATCH_OUTPUT_NAME.search(os.path.basename(match)))]
+        for input_file in matches if found else [pattern]:
+            if input_file not in input_files:
+                input_files.append(input_file)
+    return input_files
+
+def plan_output_dirs(input_files, output_dir=None):
+    """
+    Output directory per input. Under `output_dir` the inputs keep their layout relative to their
+    common parent, so per-account exports such as acct1/dataset.json and acct2/dataset.json
+    do not write the same files.
+    """
+    if not output_dir:
+        return {input_file: Path(input_file).parent for input_file in input_files}
+    parents = {input_file: Path(input_file).resolve().parent for input_file in input_files}
+    root = Path(os.path.commonpath(list(parents.values()))) if parents else None
+    return {input_file: Path(output_dir) / parent.relative_to(root) for input_file, parent in parents.items()}
+
+def batch_main(argv=None):
+    """Non-interactive mode: sort many exports in parallel and print a JSON summary to stdout."""
+    parser = argparse.ArgumentParser(description="Sort TikTok JSON exports by a metric and write top X versions.")
+    parser.add_argument("inputs", nargs="+",
+                        help="Export files or glob patterns (quote globs, e.g. \"exports/**/*.json\"); globs skip earlier outputs")
+    parser.add_argument("--key", default="playCount", help="Item field to sort by (default: playCount)")
+    parser.add_argument("--order", choices=["desc", "asc"], default="desc", help="Sort order (default: desc)")
+    parser.add_argument("--cutoffs", type=int, nargs="+", metavar="N",
+                        help="Write a top N file per cutoff; without it, write one fully sorted file per input")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="indent",
+                        help="indent (indent=2, as the interactive script), compact, or ndjson (one item per line) (default: indent)")
+    parser.add_argument("--output-dir", help="Directory for the outputs, mirroring the inputs' subdirectories (default: next to each input)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes sorting files in parallel (default: number of CPUs)")
+    args = parser.parse_args(argv)
+    if args.cutoffs and any(cutoff <= 0 for cutoff in args.cutoffs):
+        parser.error("cutoffs must be positive")
+    
+    start_time = time.perf_counter()
+    input_files = expand_inputs(args.inputs)
+    output_dirs = plan_output_dirs(input_files, args.output_dir)
+    results = {}
+    # Inputs whose outputs would land on the same paths (e.g. data.json and data.ndjson in one
+    # directory) would overwrite each other from different workers: fail them all instead
+    claimed = {}
+    for input_file in input_files:
+        claimed.setdefault((output_dirs[input_file].resolve(), Path(input_file).stem), []).append(input_file)
+    for clashing in claimed.values():
+        if len(clashing) > 1:
+            for input_file in clashing:
+                others = ", ".join(other for other in clashing if other != input_file)
+                results[input_file] = {"input": input_file, "items": None, "outputs": [],
+                                       "error": f"Output names collide with {others}", "seconds": 0.0}
+                print(f"❌ {input_file} (output names collide with {others})", file=sys.stderr)
+    pending = [input_file for input_file in input_files if input_file not in results]
+    workers = max(1, min(args.workers, len(pending)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_export, input_file, output_dirs[input_file], args.key, args.order == "asc",
+                                   args.cutoffs, args.format): input_file for input_file in pending}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            print(f"{'✅' if 'error' not in result else '❌'} {result['input']} ({result['seconds']:.2f}s)", file=sys.stderr)
+    
+    files = [results[input_file] for input_file in input_files]
+    failed = sum(1 for result in files if "error" in result)
+    summary = {
+        "files": files,
+        "ok": len(files) - failed,
+        "failed": failed,
+        "items": sum(result["items"] or 0 for result in files),
+        "workers": workers,
+        "busy_seconds": round(sum(result["seconds"] for result in files), 3),
+        "wall_seconds": round(time.perf_counter() - start_time, 3),
+    }
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    return 1 if failed else 0
 
 def get_positive_integer(prompt, default=None):
     """Get a positive integer from user input with validation."""
@@ -141,15 +688,36 @@ def main():
     print("\nOptions:")
     print("1. Sort only (keep all posts)")
     print("2. Sort and filter to top X posts")
-    print("3. Create multiple top X versions (10, 25, 50, 100, 250)")
+    print(f"3. Create multiple top X versions ({', '.join(map(str, DEFAULT_TOP_COUNTS))})")
+    print("4. Merge new exports into the ranked file")
+    
+    mode = input("\nEnter choice (1, 2, 3, or 4): ").strip()
     
-    mode = input("\nEnter choice (1, 2, or 3): ").strip()
+    if mode == "4":
+        new_files = input("\nNew export files (separated by commas): ").strip()
+        new_files = [name.strip() for name in new_files.split(",") if name.strip()]
+        if not new_files:
+            print("Operation cancelled.")
+            return
+        output_file = input(f"Output filename (default: overwrite {input_file}): ").strip() or None
+        if merge_exports(input_file, new_files, output_file):
+            print(f"\n✅ Success! Data saved to: {output_file or input_file}")
+        else:
+            print("\n❌ Merge failed!")
+        return
     
     if mode == "3":
         # Create multiple versions
-        confirm = input("\nThis will create 5 new files with different top X counts. Continue? (y/n): ").strip().lower()
+        while True:
+            try:
+                top_counts = parse_top_counts(input(f"\nCutoffs (default: {', '.join(map(str, DEFAULT_TOP_COUNTS))}): "),
+                                              DEFAULT_TOP_COUNTS)
+                break
+            except ValueError:
+                print("Please enter positive numbers separated by commas or spaces.")
+        confirm = input(f"\nThis will create {len(set(top_counts))} new files with different top X counts. Continue? (y/n): ").strip().lower()
         if confirm in ['y', 'yes']:
-            create_top_x_versions(input_file)
+            create_top_x_versions(input_file, top_counts=top_counts)
         else:
             print("Operation cancelled.")
         return
@@ -207,4 +775,6 @@ def main():
         print("\n❌ Processing failed!")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(batch_main())
     main() 
\ No newline at end of file
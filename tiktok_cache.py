@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Columnar cache of a TikTok export for fast ranking by any metric.
+
+Built once per export: every metric becomes a NumPy array saved next to the export and
+memory-mapped on later runs, together with each item's byte offsets in the source file.
+A query ranks with a vectorized argpartition and only reads and parses the K items it returns.
+"""
+
+import argparse
+import json
+import mmap
+import os
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from sort_json_by_playcount import JSONStream, encode_items, render_with_items, write_atomic
+
+CACHE_SUFFIX = ".cols" # Cache directory name: <export><suffix>
+CACHE_VERSION = 1
+METRIC_COLUMNS = ["playCount", "diggCount", "shareCount", "commentCount", "collectCount", "authorMeta.fans"]
+DERIVED_METRICS = {
+    # (digg + share + comment) / play, 0 for items without plays
+    "engagement_rate": lambda c: np.divide(c["diggCount"] + c["shareCount"] + c["commentCount"], c["playCount"],
+                                           out=np.zeros(len(c["playCount"])), where=c["playCount"] > 0),
+}
+
+def metric_value(item, column):
+    """Metric of one item; 'authorMeta.fans' is read flat or nested. Missing values count as 0, like the sorter."""
+    value = item.get(column)
+    if value is None and "." in column:
+        parent, child = column.split(".", 1)
+        value = (item.get(parent) or {}).get(child)
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+def build_cache(input_file, cache_dir=None):
+    """
+    Parse `input_file` once and write its columns, item byte offsets and metadata to `cache_dir`.
+
+    The export is read as latin-1 without newline translation so character positions are byte
+    positions (CRLF exports included); numbers and JSON structure are ASCII, so the metrics
+    decode correctly and text fields are never needed here.
+
+    Args:
+        input_file (str): Path to a `{"items": [...], ...}` export
+        cache_dir (str, optional): Where to write the cache. Defaults to <input_file>.cols
+
+    Returns:
+        Path: The cache directory.
+    """
+    input_path = Path(input_file)
+    cache_path = Path(cache_dir) if cache_dir else input_path.with_name(input_path.name + CACHE_SUFFIX)
+    columns = {column: array('d') for column in METRIC_COLUMNS}
+    starts, ends = array('q'), array('q')
+    metadata_spans, keys = {}, {}
+
+    stat = input_path.stat()
+    with open(input_path, 'r', encoding='latin-1', newline='') as f:
+        stream = JSONStream(f)
+        stream.expect('{')
+        while stream.peek() != '}':
+            key = stream.value()
+            keys[key] = None
+            stream.expect(':')
+            if key == 'items':
+                stream.expect('[')
+                while stream.peek() != ']':
+                    starts.append(stream.tell())
+                    item = stream.value()
+                    ends.append(stream.tell())
+                    for column, values in columns.items():
+                        values.append(metric_value(item, column))
+                    if stream.peek() == ',':
+                        stream.pos += 1
+                stream.expect(']')
+            else:
+                stream.peek()
+                start = stream.tell()
+                stream.value()
+                metadata_spans[key] = (start, stream.tell())
+            if stream.peek() == ',':
+                stream.pos += 1
+    if 'items' not in keys:
+        raise ValueError(f"{input_file} does not contain an 'items' array")
+    # Metadata is re-read as UTF-8 so its strings survive the latin-1 pass
+    metadata = {}
+    with open(input_path, 'rb') as f:
+        for key, (start, end) in metadata_spans.items():
+            f.seek(start)
+            metadata[key] = json.loads(f.read(end - start).decode('utf-8'))
+
+    cache_path.mkdir(parents=True, exist_ok=True)
+    for column, values in columns.items():
+        np.save(cache_path / f"{column}.npy", np.frombuffer(values, dtype=np.float64))
+    np.save(cache_path / "offsets.npy", np.stack([np.frombuffer(starts, dtype=np.int64), np.frombuffer(ends, dtype=np.int64)], axis=1))
+    meta = {
+        "version": CACHE_VERSION,
+        "source": str(input_path.resolve()),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "count": len(starts),
+        "columns": METRIC_COLUMNS,
+        "keys": list(keys),
+        "metadata": metadata,
+    }
+    # Written last, so a cache interrupted mid-build is seen as missing and rebuilt
+    write_atomic(cache_path / "meta.json", json.dumps(meta, indent=2, ensure_ascii=False))
+    return cache_path
+
+class ItemCache:
+    """
+    Memory-mapped columns of one export. Use ItemCache.open(), which (re)builds the cache when
+    it is missing or the export changed since it was built.
+    """
+
+    def __init__(self, input_file, cache_dir):
+        self.input_file = Path(input_file)
+        self.cache_dir = Path(cache_dir)
+        self.meta = json.loads((self.cache_dir / "meta.json").read_text(encoding='utf-8'))
+        self.columns = {column: np.load(self.cache_dir / f"{column}.npy", mmap_mode='r') for column in self.meta["columns"]}
+        self.offsets = np.load(self.cache_dir / "offsets.npy", mmap_mode='r')
+
+    @classmethod
+    def open(cls, input_file, cache_dir=None, rebuild=False):
+        input_path = Path(input_file)
+        cache_path = Path(cache_dir) if cache_dir else input_path.with_name(input_path.name + CACHE_SUFFIX)
+        if rebuild or not cls.is_fresh(input_path, cache_path):
+            print(f"Building column cache for {input_file} in {cache_path}...")
+            build_cache(input_path, cache_path)
+        return cls(input_path, cache_path)
+
+    @staticmethod
+    def is_fresh(input_path, cache_path):
+        try:
+            meta = json.loads((Path(cache_path) / "meta.json").read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return False
+        stat = Path(input_path).stat()
+        return (meta.get("version") == CACHE_VERSION and meta.get("source_size") == stat.st_size
+                and meta.get("source_mtime_ns") == stat.st_mtime_ns)
+
+    def __len__(self):
+        return self.meta["count"]
+
+    @property
+    def metrics(self):
+        return list(self.columns) + list(DERIVED_METRICS)
+
+    def values(self, metric):
+        """The metric for every item, as an array in file order."""
+        if metric in self.columns:
+            return self.columns[metric]
+        if metric in DERIVED_METRICS:
+            return DERIVED_METRICS[metric](self.columns)
+        raise KeyError(f"Unknown metric '{metric}'. Available: {', '.join(self.metrics)}")
+
+    def top_indices(self, metric, k, ascending=False):
+        """
+        Indices of the first `k` items ranked by `metric`, in rank order.
+        Ties keep their file order, matching the sorter's stable sort.
+        """
+        values = np.asarray(self.values(metric), dtype=np.float64)
+        keys = values if ascending else -values
+        count = len(keys)
+        k = min(k, count)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        if k < count:
+            kth = keys[np.argpartition(keys, k - 1)[k - 1]]
+            better = np.flatnonzero(keys < kth)
+            tied = np.flatnonzero(keys == kth)[:k - len(better)]
+            selected = np.concatenate([better, tied])
+        else:
+            selected = np.arange(count)
+        # lexsort sorts by the last key first: rank by value, then by file position
+        return selected[np.lexsort((selected, keys[selected]))]
+
+    def items(self, indices):
+        """Read and parse only the given items from the source export."""
+        with open(self.input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            return [json.loads(source[self.offsets[i, 0]:self.offsets[i, 1]].decode('utf-8')) for i in indices]
+
+    def top(self, metric, k, ascending=False):
+        return self.items(self.top_indices(metric, k, ascending))
+
+    def write_top(self, output_file, metric, k, ascending=False):
+        """Write the top `k` items by `metric` in the sorter's format (original metadata, indent=2)."""
+        items = self.top(metric, k, ascending)
+        data = {key: items if key == 'items' else self.meta["metadata"][key] for key in self.meta["keys"]}
+        write_atomic(output_file, render_with_items(data, encode_items(items)))
+        return items
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank a TikTok export by any metric using a memory-mapped column cache.")
+    parser.add_argument("input_file", help="Export with an 'items' array, e.g. content/top-250-tt.json")
+    parser.add_argument("--metric", default="playCount",
+                        help=f"Metric to rank by: {', '.join(METRIC_COLUMNS + list(DERIVED_METRICS))} (default: playCount)")
+    parser.add_argument("--top", type=int, default=25, help="Number of items to return (default: 25)")
+    parser.add_argument("--ascending", action="store_true", help="Lowest values first")
+    parser.add_argument("--output", help="Write the ranked items here in the sorter's format instead of printing a summary")
+    parser.add_argument("--cache-dir", help=f"Cache location (default: <input_file>{CACHE_SUFFIX})")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the cache even if it is up to date")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_file):
+        print(f"Error: {args.input_file} not found")
+        return 1
+    cache = ItemCache.open(args.input_file, args.cache_dir, args.rebuild)
+    try:
+        if args.output:
+            items = cache.write_top(args.output, args.metric, args.top, args.ascending)
+            print(f"✅ Wrote top {len(items)} of {len(cache):,} items by {args.metric} to {args.output}")
+            return 0
+        indices = cache.top_indices(args.metric, args.top, args.ascending)
+    except KeyError as e:
+        print(f"Error: {e.args[0]}")
+        return 1
+    values = cache.values(args.metric)
+    for rank, (index, item) in enumerate(zip(indices, cache.items(indices)), 1):
+        value = float(values[index])
+        shown = f"{value:,.0f}" if value.is_integer() else f"{value:.4f}"
+        print(f"{rank:>4}. {shown:>14}  {item.get('webVideoUrl') or item.get('id')}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
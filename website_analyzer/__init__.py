@@ -0,0 +1,49 @@
+"""
+Website aesthetic analyzer: screenshot the sites in a Google Maps export and classify them via OpenRouter.
+
+Typical use from Python (e.g. an n8n Execute node):
+
+    from website_analyzer import Analyzer
+    df = Analyzer(input_csv="leads.csv", output_csv="leads_analyzed.csv", browsers=2).run()
+
+or from the shell: python -m website_analyzer --help
+
+Importing the package has no side effects and loads no heavy dependencies; the names below are
+imported from their submodules on first access.
+"""
+import importlib
+
+_EXPORTS = {
+    "Analyzer": ".analyzer",
+    "AnalyzerConfig": ".config",
+    "AsyncAnalysisEngine": ".analysis",
+    "analyze_website_aesthetic_categorized": ".analysis",
+    "BrowserPool": ".browser",
+    "CaptureProfile": ".browser",
+    "capture_page": ".browser",
+    "VerdictCache": ".cache",
+    "ImageEncoding": ".images",
+    "optimize_screenshot_bytes": ".images",
+    "SiteJob": ".jobs",
+    "plan_site_jobs": ".planning",
+    "Preclassifier": ".preclassify",
+    "run_pipeline": ".pipeline",
+    "ResultsJournal": ".results",
+    "RunTracer": ".results",
+    "canonical_url_key": ".urls",
+    "configure_logging": ".logs",
+    "main": ".cli",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
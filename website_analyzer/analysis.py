@@ -0,0 +1,582 @@
+"""Prompts, verdict parsing and the OpenRouter clients (sync one-off calls and the async rate-limited engine)."""
+import asyncio
+import base64
+import logging
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from openai import OpenAI, AsyncOpenAI, APIError, RateLimitError, APIConnectionError, APITimeoutError # OpenAI client
+
+from .cache import VerdictCache
+from .config import (ANALYZE_BATCH_LINGER_SECONDS, ANALYZE_BATCH_SIZE, ANALYZE_INITIAL_IN_FLIGHT, ANALYZE_MAX_IN_FLIGHT,
+                     ANALYZE_MAX_RETRIES, ANALYZE_REQUESTS_PER_SECOND, DEFAULT_OPENROUTER_BASE_URL, OPENROUTER_HEADERS)
+from .images import encode_image_to_base64, image_data_url
+
+logger = logging.getLogger(__name__)
+
+def openrouter_settings(api_key: str | None = None, base_url: str | None = None) -> tuple[str, str]:
+    """
+    Resolve (api_key, base_url), falling back to OPENROUTER_API_KEY / OPENROUTER_BASE_URL in the environment.
+
+    Raises ValueError when no API key is available, so callers fail before any work is queued.
+    """
+    api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise ValueError("OPENROUTER_API_KEY not found. Please set it in your .env file or pass api_key.")
+    return api_key, base_url or os.getenv("OPENROUTER_BASE_URL", DEFAULT_OPENROUTER_BASE_URL)
+
+def make_openrouter_client(api_key: str | None = None, base_url: str | None = None) -> OpenAI:
+    """Synchronous OpenAI client configured for OpenRouter (see openrouter_settings)."""
+    api_key, base_url = openrouter_settings(api_key, base_url)
+    return OpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        default_headers=OPENROUTER_HEADERS,
+    )
+
+PROMPT_TEXT = """
+            Analyze the aesthetic of the website in the attached screenshot and classify its design into one of three categories: 'Modern', 'Acceptable', or 'Outdated'. Then, provide a one or two-sentence explanation for your classification, focusing on specific visual elements.
+
+            Definitions (based on 2025 web design standards):
+            - Modern: The website looks highly professional and contemporary, incorporating advanced modern design trends such as effective use of white space, modern typography (e.g., sans-serif fonts with varied weights), a cohesive and visually appealing color scheme, high-quality images or graphics, contemporary UI elements (e.g., buttons with hover effects, gradients, or subtle animations), and clear indicators of responsive design (e.g., adaptable layouts, mobile-friendly elements). It feels cutting-edge and aligns with the best practices of 2025.
+            - Acceptable: The website is functional and has a decent, professional aesthetic, with a clean and organized layout, legible typography, a cohesive color scheme, and at least some professional elements (e.g., high-quality images, structured navigation). It may lack advanced modern design trends but is not significantly dated or visually unappealing, making it acceptable by 2025 standards.
+            - Outdated: The website appears dated and visually unappealing by 2025 standards, resembling designs from the early 2000s or 2010s. This includes websites with cluttered or overly basic layouts, lack of any professional aesthetic, low-quality or pixelated images, clashing or dated colors, poor typography, or an overall impression that feels unprofessional and significantly out-of-touch with current trends.
+
+            Key Evaluation Criteria:
+            - Modern Design Elements: Does the website use effective white space, modern typography, and contemporary UI elements (e.g., hover effects, gradients, animations) (Modern), or does it lack these but still look professional (Acceptable), or lack them entirely with a dated appearance (Outdated)?
+            - Image Quality: Are images high-quality, relevant, and well-integrated (Modern or Acceptable), or are they low-quality, pixelated, or generic (Outdated)?
+            - Color Scheme: Is the color scheme cohesive, visually appealing, and modern (Modern), professional but simple (Acceptable), or bland, clashing, or dated (Outdated)?
+            - Typography: Are fonts modern, varied, and legible (Modern), basic but professional and legible (Acceptable), or plain, inconsistent, and dated (Outdated)?
+            - Layout: Is the layout clean, intuitive, and well-structured with clear hierarchy (Modern), organized and functional (Acceptable), or cluttered, unbalanced, or overly simplistic (Outdated)?
+            - Responsiveness Indicators: Does the layout suggest adaptability (e.g., flexible grids, mobile-friendly elements) (Modern), appear functional but rigid (Acceptable), or look broken or desktop-only (Outdated)?
+            - Overall Impression: Does the website feel cutting-edge and aligned with 2025 standards (Modern), professional but not modern (Acceptable), or like it was built in the early 2000s or 2010s with significant flaws (Outdated)?
+
+            Important Notes:
+            - To be classified as 'Modern', a website must exhibit advanced modern design trends (e.g., hover effects, gradients, animations) and feel cutting-edge by 2025 standards.
+            - 'Acceptable' websites are functional, professional, and have a decent aesthetic (e.g., clean layout, cohesive colors), even if they lack advanced modern elements. They should not feel significantly dated or unprofessional.
+            - 'Outdated' websites must have significant aesthetic flaws (e.g., cluttered layouts, clashing colors, pixelated images) and feel unprofessional by 2025 standards, making them clear candidates for a redesign.
+            - Prioritize the overall impression based on 2025 standards. If a website is functional and has a decent, professional aesthetic but lacks advanced modern elements, classify it as 'Acceptable'. Only classify as 'Outdated' if it has significant flaws and feels unprofessional or dated.
+
+            Format your response EXACTLY as:
+            Category: [Modern, Acceptable, or Outdated]
+            Explanation: [Your brief explanation based on the screenshot, mentioning at least one specific visual element from the criteria]
+            """
+
+VALID_CATEGORIES = ["Modern", "Acceptable", "Outdated"]
+
+def build_messages(base64_image: str) -> list[dict]:
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": PROMPT_TEXT},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": image_data_url(base64_image)
+                    },
+                },
+            ],
+        }
+    ]
+
+def parse_verdict(response_text: str, image_name: str, model_name: str) -> tuple[str, str]:
+    """Extract (category, explanation) from a model response, including the 'Outdated' sanity check."""
+    category_match = re.search(r"Category:\s*(Modern|Acceptable|Outdated)", response_text, re.IGNORECASE)
+    explanation_match = re.search(r"Explanation:\s*(.*)", response_text, re.DOTALL | re.IGNORECASE)
+
+    if category_match:
+        extracted_cat = category_match.group(1).capitalize()
+        if extracted_cat in VALID_CATEGORIES:
+            category = extracted_cat
+        else:
+            category = "Invalid Category from LLM"
+            logger.warning(f"LLM ({model_name}) provided an invalid category for {image_name}: {extracted_cat}")
+    else:
+        if "modern" in response_text.lower():
+            category = "Modern"
+        elif "acceptable" in response_text.lower():
+            category = "Acceptable"
+        elif "outdated" in response_text.lower():
+            category = "Outdated"
+        else:
+            category = "Uncategorized - Format Error"
+        logger.warning(f"'Category:' line not found for {image_name} from {model_name}. Fallback category: {category}")
+
+    if explanation_match:
+        explanation = explanation_match.group(1).strip()
+    elif category not in ["Uncategorized - Format Error", "Invalid Category from LLM", "Error"]:
+        explanation = "Explanation not found in expected format, but category assigned."
+        logger.warning(f"Explanation format error for {image_name} from {model_name}, but category '{category}' assigned.")
+    else:
+        explanation = f"Raw LLM Response (format error): {response_text[:250]}..."
+
+    # Post-processing check to ensure "Outdated" classifications have significant flaws
+    if category == "Outdated":
+        significant_flaws = ["cluttered", "clashing", "pixelated", "dated", "unprofessional", "poor", "inconsistent"]
+        if not any(flaw in explanation.lower() for flaw in significant_flaws):
+            logger.warning(f"Reclassifying {image_name} as 'Acceptable': Explanation lacks significant aesthetic flaws.")
+            category = "Acceptable"
+            explanation = f"{explanation} (Reclassified as Acceptable due to lack of significant aesthetic flaws by 2025 standards.)"
+
+    return category, explanation
+
+BATCH_PROMPT_TEXT = (
+    "You will receive several website screenshots. Each one is introduced by a line 'Image ID: <id>'.\n"
+    "Apply the instructions below to every screenshot independently.\n"
+    + PROMPT_TEXT.split("Format your response EXACTLY as:")[0]
+    + """Format your response as one block per screenshot, using each screenshot's Image ID, EXACTLY as:
+            Image ID: [id]
+            Category: [Modern, Acceptable, or Outdated]
+            Explanation: [Your brief explanation based on that screenshot, mentioning at least one specific visual element from the criteria]
+            """
+)
+
+def build_batch_messages(images: list[tuple[str, str]]) -> list[dict]:
+    """Messages for a multi-image request; `images` is a list of (image_id, base64_image)."""
+    content = [{"type": "text", "text": BATCH_PROMPT_TEXT}]
+    for image_id, base64_image in images:
+        content.append({"type": "text", "text": f"Image ID: {image_id}"})
+        content.append({"type": "image_url", "image_url": {"url": image_data_url(base64_image)}})
+    return [{"role": "user", "content": content}]
+
+def parse_batch_verdicts(response_text: str, image_ids: list[str]) -> dict[str, str]:
+    """
+    Split a batch response into per-image blocks keyed by Image ID.
+
+    Only well-formed blocks (a known ID, a valid 'Category:' and an 'Explanation:') are returned;
+    anything else is left for the caller to retry as a single-image request.
+    """
+    blocks = {}
+    parts = re.split(r"^\s*\**Image ID:?\**\s*\[?([\w-]+)\]?\s*$", response_text, flags=re.IGNORECASE | re.MULTILINE)
+    for image_id, block in zip(parts[1::2], parts[2::2]):
+        image_id = image_id.lower()
+        if image_id not in image_ids or image_id in blocks:
+            continue
+        if re.search(r"Category:\s*(Modern|Acceptable|Outdated)", block, re.IGNORECASE) and re.search(r"Explanation:", block, re.IGNORECASE):
+            blocks[image_id] = block.strip()
+    return blocks
+
+def lookup_cached_verdict(cache: VerdictCache | None, image: Path | bytes, model_name: str, image_name: str) -> tuple[str | None, tuple[str, str] | None]:
+    """Return (cache_key, cached verdict or None). The key is None when there is no usable cache."""
+    if cache is None:
+        return None, None
+    try:
+        cache_key = VerdictCache.make_key(image, model_name, PROMPT_TEXT)
+        cached = cache.get(cache_key)
+    except Exception as e:
+        logger.warning(f"Verdict cache lookup failed for {image_name}: {e}")
+        return None, None
+    if cached:
+        logger.info(f"Verdict cache hit for {image_name}: {cached[0]}")
+    return cache_key, cached
+
+def store_verdict(cache: VerdictCache | None, cache_key: str | None, model_name: str,
+                  category: str, explanation: str, image_name: str):
+    if cache is None or not cache_key or category not in VALID_CATEGORIES:
+        return
+    try:
+        cache.put(cache_key, model_name, category, explanation)
+    except Exception as e:
+        logger.warning(f"Could not store verdict for {image_name} in cache: {e}")
+
+def analyze_website_aesthetic_categorized(image_path: Path, model_name: str, cache: VerdictCache | None = None,
+                                          image_bytes: bytes | None = None, client: OpenAI | None = None) -> tuple[str, str]:
+    """
+    Classify a screenshot. If `image_bytes` is given it is used directly and `image_path` only names it in logs.
+
+    Uses `client` if given, otherwise a client built by make_openrouter_client() from the environment.
+    """
+    logger.info(f"Starting aesthetic analysis for image: {image_path.name} using OpenRouter model: {model_name}")
+    analysis_start_time = time.perf_counter()
+
+    if image_bytes is None and not image_path.exists():
+        logger.error(f"Screenshot not available for analysis: {image_path}")
+        return "Error", "Screenshot not available for analysis."
+
+    cache_key, cached = lookup_cached_verdict(cache, image_bytes if image_bytes is not None else image_path,
+                                              model_name, image_path.name)
+    if cached:
+        return cached
+
+    category = "Uncategorized"
+    explanation = "Analysis initially failed or format incorrect."
+
+    if image_bytes is not None:
+        base64_image = base64.b64encode(image_bytes).decode('utf-8')
+        img_size_bytes = len(image_bytes)
+    else:
+        base64_image = encode_image_to_base64(image_path)
+        img_size_bytes = image_path.stat().st_size if base64_image else 0
+    if not base64_image:
+        return "Error", "Failed to encode image."
+
+    max_retries = 3
+    base_delay = 5  # seconds
+    client = client or make_openrouter_client()
+
+    for attempt in range(max_retries):
+        try:
+            logger.info(f"Attempt {attempt + 1}/{max_retries} to analyze {image_path.name} ({img_size_bytes / 1024:.2f} KB) with {model_name}")
+
+            logger.debug(f"Sending request to OpenRouter model {model_name}...")
+            model_call_start_time = time.perf_counter()
+
+            response = client.chat.completions.create(
+                model=model_name,
+                messages=build_messages(base64_image),
+                max_tokens=200
+            )
+
+            model_call_duration = time.perf_counter() - model_call_start_time
+            logger.info(f"OpenRouter model call for {image_path.name} took {model_call_duration:.4f}s (Attempt {attempt+1})")
+
+            response_text = response.choices[0].message.content.strip()
+            logger.debug(f"OpenRouter raw response for {image_path.name} (first 300 chars): {response_text[:300]}")
+            category, explanation = parse_verdict(response_text, image_path.name, model_name)
+            break  # Success, exit retry loop
+
+        except (RateLimitError, APIConnectionError, APITimeoutError) as e:
+            logger.warning(f"API call attempt {attempt + 1} for {image_path.name} failed with {type(e).__name__}: {e}")
+            if attempt + 1 == max_retries:
+                logger.error(f"All {max_retries} API call attempts failed for {image_path.name}.", exc_info=True)
+                explanation = f"Failed API call after {max_retries} attempts: {e}"
+                category = "Error"
+                break
+            delay = base_delay * (2 ** attempt) + (0.5 * base_delay * attempt)
+            logger.info(f"Retrying API call in {delay:.2f} seconds...")
+            time.sleep(delay)
+        except APIError as e:
+            logger.error(f"OpenRouter APIError on attempt {attempt + 1} for {image_path.name}: {e}", exc_info=True)
+            explanation = f"OpenRouter APIError: {e}"
+            category = "Error"
+            break
+        except Exception as e:
+            logger.error(f"Unexpected error during OpenRouter analysis attempt {attempt + 1} for {image_path.name}: {e}", exc_info=True)
+            explanation = f"Unexpected analysis error: {e}"
+            category = "Error"
+            break
+
+    store_verdict(cache, cache_key, model_name, category, explanation, image_path.name)
+
+    logger.info(f"Aesthetic analysis for {image_path.name} complete. Category: {category}. Total time: {time.perf_counter() - analysis_start_time:.4f}s")
+    return category, explanation
+
+def _parse_reset_seconds(value: str | None) -> float | None:
+    """Seconds until a rate-limit window resets. Accepts '20', '1.5', '6m0s', '250ms', epoch seconds or epoch ms."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        number = float(value)
+    except ValueError:
+        units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+        parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+        if not parts:
+            return None
+        return sum(float(amount) * units[unit] for amount, unit in parts)
+    if number > 1e12: # Epoch milliseconds (OpenRouter's X-RateLimit-Reset)
+        return max(0.0, number / 1000 - time.time())
+    if number > 1e9: # Epoch seconds
+        return max(0.0, number - time.time())
+    return max(0.0, number)
+
+class AdaptiveRateLimiter:
+    """
+    Shared asyncio limiter: a token bucket for request rate plus an AIMD concurrency window.
+
+    Every request takes one token (refilled at `rate` per second) and one in-flight slot.
+    The in-flight window grows by roughly one slot per window of successes; a 429 halves it and
+    the rate and drains the bucket, at most once per congestion epoch: 429s for requests issued
+    before the last decrease, or within one in-flight window after it, were already accounted
+    for. `Retry-After` pauses all requests, and X-RateLimit-Remaining / X-RateLimit-Reset style
+    headers can only lower the rate to what the provider says is left in the window.
+    """
+
+    def __init__(self, rate: float, burst: int, initial_concurrency: int, max_concurrency: int,
+                 min_rate: float = 0.1):
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(min(initial_concurrency, max_concurrency))
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._issued = 0 # Tickets handed out by acquire()
+        self._decreased_at = 0 # Tickets up to this one belong to the last decrease's epoch
+        self._last_refill = time.monotonic()
+        self._condition = asyncio.Condition()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self) -> int:
+        """Wait for a token and an in-flight slot. Returns the ticket to hand back to release()."""
+        async with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.in_flight >= int(self.concurrency):
+                    wait = None # Woken by release()
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    self._issued += 1
+                    return self._issued
+                try:
+                    await asyncio.wait_for(self._condition.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, throttled: bool = False, headers=None, ticket: int | None = None):
+        async with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                if ticket is None or ticket > self._decreased_at: # First 429 of this congestion epoch
+                    self.concurrency = max(1.0, self.concurrency / 2)
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self.tokens = min(self.tokens, 0.0) # No leftover burst straight back into the limit
+                    # The epoch covers what is in flight now and the next window of requests
+                    self._decreased_at = self._issued + int(self.concurrency)
+                    logger.warning(f"Rate limited: concurrency -> {int(self.concurrency)}, rate -> {self.rate:.2f} req/s")
+            else:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+                self.rate = min(self.max_rate, self.rate * 1.05)
+            if headers is not None:
+                self._observe_headers(headers)
+            self._condition.notify_all()
+
+    def _observe_headers(self, headers):
+        now = time.monotonic()
+        retry_after = _parse_reset_seconds(headers.get("retry-after"))
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+            logger.info(f"Provider asked to retry after {retry_after:.1f}s; pausing requests.")
+        remaining = headers.get("x-ratelimit-remaining") or headers.get("x-ratelimit-remaining-requests")
+        reset = _parse_reset_seconds(headers.get("x-ratelimit-reset") or headers.get("x-ratelimit-reset-requests"))
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining = float(remaining)
+        except ValueError:
+            return
+        if remaining <= 0:
+            self.paused_until = max(self.paused_until, now + reset)
+        elif reset > 0:
+            self.rate = min(self.rate, max(self.min_rate, remaining / reset)) # Never undo an AIMD decrease
+
+def _count(stats: dict | None, key: str, amount: float = 1):
+    """Add `amount` to stats[key] if the caller asked for per-request stats."""
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + amount
+
+class AsyncAnalysisEngine:
+    """
+    Runs OpenRouter calls on an asyncio loop in a background thread, gated by an AdaptiveRateLimiter.
+
+    Pipeline threads call `classify()`, which blocks only the calling thread; many requests are
+    in flight at once and rate-limit backoff is an `asyncio.sleep`, so it never stalls the run.
+    With `batch_size` > 1, screenshots arriving within `batch_linger_seconds` of each other are
+    sent together in one request (see `_classify_batch`).
+    Point `base_url` (or OPENROUTER_BASE_URL) at a local OpenAI-compatible server to exercise it offline.
+    """
+
+    def __init__(self, model_name: str, base_url: str | None = None, api_key: str | None = None,
+                 requests_per_second: float = ANALYZE_REQUESTS_PER_SECOND,
+                 initial_concurrency: int = ANALYZE_INITIAL_IN_FLIGHT, max_concurrency: int = ANALYZE_MAX_IN_FLIGHT,
+                 max_retries: int = ANALYZE_MAX_RETRIES, batch_size: int = ANALYZE_BATCH_SIZE,
+                 batch_linger_seconds: float = ANALYZE_BATCH_LINGER_SECONDS):
+        api_key, base_url = openrouter_settings(api_key, base_url)
+        self.model_name = model_name
+        self.max_retries = max_retries
+        self.batch_size = max(1, batch_size)
+        self.batch_linger_seconds = batch_linger_seconds
+        self.api_calls = 0
+        self.batch_fallbacks = 0
+        self._batch_tasks = set()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="openrouter-async", daemon=True)
+        self._thread.start()
+        self.limiter = self._run(self._make_limiter(requests_per_second, initial_concurrency, max_concurrency))
+        self.client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            default_headers=OPENROUTER_HEADERS,
+            max_retries=0, # Retries are driven by the limiter instead of the SDK's fixed backoff
+        )
+        if self.batch_size > 1:
+            self._batch_queue = self._run(self._make_queue())
+            self._batcher = asyncio.run_coroutine_threadsafe(self._run_batcher(), self._loop)
+        logger.info(f"Async analysis engine started ({requests_per_second} req/s, "
+                     f"{initial_concurrency}-{max_concurrency} in flight, batches of {self.batch_size}) against {base_url}")
+
+    @staticmethod
+    async def _make_limiter(rate, initial_concurrency, max_concurrency) -> AdaptiveRateLimiter:
+        return AdaptiveRateLimiter(rate, max(1, int(rate)), initial_concurrency, max_concurrency)
+
+    @staticmethod
+    async def _make_queue() -> asyncio.Queue:
+        return asyncio.Queue()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def classify(self, image_bytes: bytes, image_name: str, stats: dict | None = None) -> tuple[str, str]:
+        """
+        Blocking entry point for pipeline threads.
+
+        If `stats` is given, it accumulates api_calls, retries, throttled and api_seconds for this
+        screenshot (a batched request counts once for every screenshot in it) and batch_size.
+        """
+        return self._run(self.aclassify(image_bytes, image_name, stats))
+
+    async def aclassify(self, image_bytes: bytes, image_name: str, stats: dict | None = None) -> tuple[str, str]:
+        if self.batch_size == 1:
+            return await self._classify_single(image_bytes, image_name, stats)
+        future = self._loop.create_future()
+        await self._batch_queue.put((image_bytes, image_name, future, stats))
+        return await future
+
+    async def _complete(self, messages: list[dict], max_tokens: int, label: str,
+                        stats: dict | None = None) -> tuple[str | None, str]:
+        """Send one chat completion through the limiter with retries. Returns (response_text, error_explanation)."""
+        error_explanation = "Analysis initially failed or format incorrect."
+        for attempt in range(self.max_retries):
+            ticket = await self.limiter.acquire()
+            throttled = False
+            headers = None
+            retry_delay = 0
+            model_call_start_time = time.perf_counter()
+            try:
+                self.api_calls += 1
+                _count(stats, "api_calls")
+                if attempt:
+                    _count(stats, "retries")
+                raw = await self.client.chat.completions.with_raw_response.create(
+                    model=self.model_name, messages=messages, max_tokens=max_tokens
+                )
+                headers = raw.headers
+                response = raw.parse()
+                logger.info(f"OpenRouter model call for {label} took {time.perf_counter() - model_call_start_time:.4f}s "
+                             f"(Attempt {attempt + 1}, {self.limiter.in_flight} in flight)")
+                return response.choices[0].message.content.strip(), ""
+            except RateLimitError as e:
+                throttled = True
+                headers = e.response.headers
+                logger.warning(f"Rate limited on attempt {attempt + 1} for {label}")
+                if not _parse_reset_seconds(headers.get("retry-after")):
+                    # Without Retry-After nothing pauses the limiter: back off with jitter before retrying
+                    retry_delay = min(30, 2 ** attempt) * random.uniform(0.5, 1.5)
+                error_explanation = f"Failed API call after {self.max_retries} attempts: {e}"
+            except (APIConnectionError, APITimeoutError) as e:
+                logger.warning(f"API call attempt {attempt + 1} for {label} failed with {type(e).__name__}: {e}")
+                error_explanation = f"Failed API call after {self.max_retries} attempts: {e}"
+                retry_delay = min(30, 2 ** attempt)
+            except APIError as e:
+                logger.error(f"OpenRouter APIError on attempt {attempt + 1} for {label}: {e}")
+                return None, f"OpenRouter APIError: {e}"
+            except Exception as e:
+                logger.error(f"Unexpected error during OpenRouter analysis attempt {attempt + 1} for {label}: {e}", exc_info=True)
+                return None, f"Unexpected analysis error: {e}"
+            finally:
+                _count(stats, "api_seconds", time.perf_counter() - model_call_start_time)
+                if throttled:
+                    _count(stats, "throttled")
+                await self.limiter.release(throttled, headers, ticket)
+            if retry_delay:
+                await asyncio.sleep(retry_delay) # Outside the limiter so the slot is free meanwhile
+        return None, error_explanation
+
+    async def _classify_single(self, image_bytes: bytes, image_name: str, stats: dict | None = None) -> tuple[str, str]:
+        analysis_start_time = time.perf_counter()
+        messages = build_messages(base64.b64encode(image_bytes).decode('utf-8'))
+        response_text, error_explanation = await self._complete(messages, 200, image_name, stats)
+        if response_text is None:
+            category, explanation = "Error", error_explanation
+        else:
+            category, explanation = parse_verdict(response_text, image_name, self.model_name)
+        logger.info(f"Aesthetic analysis for {image_name} complete. Category: {category}. Total time: {time.perf_counter() - analysis_start_time:.4f}s")
+        return category, explanation
+
+    async def _run_batcher(self):
+        """Group queued screenshots into batches of up to `batch_size`, waiting at most the linger time for stragglers."""
+        while True:
+            batch = [await self._batch_queue.get()]
+            deadline = self._loop.time() + self.batch_linger_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._batch_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = self._loop.create_task(self._classify_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _classify_batch(self, batch: list[tuple[bytes, str, asyncio.Future, dict | None]]):
+        """
+        Classify several screenshots in one request, then retry singly any the model skipped or garbled.
+
+        Each image is labelled with a short per-request ID ("img1", "img2", ...) and the reply is
+        split on those IDs, so verdicts map back to the right rows regardless of answer order.
+        """
+        try:
+            if len(batch) == 1:
+                image_bytes, image_name, future, stats = batch[0]
+                future.set_result(await self._classify_single(image_bytes, image_name, stats))
+                return
+            ids = [f"img{position}" for position in range(1, len(batch) + 1)]
+            label = f"batch of {len(batch)} ({', '.join(name for _, name, _, _ in batch)})"
+            images = [(image_id, base64.b64encode(image_bytes).decode('utf-8'))
+                      for image_id, (image_bytes, _, _, _) in zip(ids, batch)]
+            batch_stats = {}
+            response_text, _ = await self._complete(build_batch_messages(images), 200 * len(batch), label, batch_stats)
+            verdicts = parse_batch_verdicts(response_text or "", ids)
+
+            fallbacks = []
+            for position, (image_id, (image_bytes, image_name, future, stats)) in enumerate(zip(ids, batch)):
+                if stats is not None:
+                    stats["batch_size"] = len(batch)
+                    # The call is recorded once, on the batch's first item, so run totals count real API calls
+                    for key, value in (batch_stats.items() if position == 0 else ()):
+                        _count(stats, key, value)
+                if image_id in verdicts:
+                    category, explanation = parse_verdict(verdicts[image_id], image_name, self.model_name)
+                    future.set_result((category, explanation))
+                else:
+                    fallbacks.append((image_bytes, image_name, future, stats))
+            if fallbacks:
+                self.batch_fallbacks += len(fallbacks)
+                logger.warning(f"{len(fallbacks)}/{len(batch)} verdicts missing or malformed in {label}; retrying them singly")
+                results = await asyncio.gather(*(self._classify_single(image_bytes, image_name, stats)
+                                                 for image_bytes, image_name, _, stats in fallbacks))
+                for (_, _, future, _), result in zip(fallbacks, results):
+                    future.set_result(result)
+        except Exception as e:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def close(self):
+        if self.batch_size > 1:
+            self._batcher.cancel()
+        self._run(self.client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        logger.info(f"Async analysis engine stopped after {self.api_calls} API calls "
+                     f"({self.limiter.throttled} rate-limited, {self.batch_fallbacks} batch items retried singly).")
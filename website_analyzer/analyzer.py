@@ -0,0 +1,260 @@
+"""
+The Analyzer: one object holding a run's configuration and its clients.
+
+Importing this module is cheap. pandas, Playwright, OpenAI and Pillow are only imported once a
+method needs them, so the CLI's --help and dry runs never pay for them.
+"""
+import csv
+import logging
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from .config import AnalyzerConfig
+from .results import ResultsJournal
+from .urls import canonical_url_key
+
+logger = logging.getLogger(__name__)
+
+def is_valid_url(website_url) -> bool:
+    return isinstance(website_url, str) and (website_url.startswith('http://') or website_url.startswith('https://'))
+
+class Analyzer:
+    """
+    Screenshot websites from a Google Maps export and classify their aesthetic via OpenRouter.
+
+    Constructing one has no side effects: nothing is imported, created or contacted until
+    `run()`, `classify_image()` or `client` is used. Settings come from an AnalyzerConfig,
+    optionally with keyword overrides, e.g. Analyzer(browsers=2, model="openai/gpt-4o-mini").
+    """
+
+    def __init__(self, config: AnalyzerConfig | None = None, **overrides):
+        self.config = replace(config or AnalyzerConfig(), **overrides)
+        self._client = None
+
+    @property
+    def client(self):
+        """Synchronous OpenRouter client, created on first use."""
+        if self._client is None:
+            from .analysis import make_openrouter_client
+            self._client = make_openrouter_client(self.config.api_key, self.config.base_url)
+        return self._client
+
+    def image_encoding(self):
+        from .images import ImageEncoding
+        return ImageEncoding(format=self.config.image_format.upper(), target_bytes=self.config.image_target_bytes,
+                             max_viewports=self.config.image_max_viewports, tile=self.config.image_tile)
+
+    def capture_profile(self):
+        """A fresh copy of the configured capture profile, so baseline samples don't carry over between runs."""
+        from .browser import CAPTURE_PROFILES
+        profile = CAPTURE_PROFILES[self.config.capture_profile]
+        extra_domains = tuple(domain.lower() for domain in self.config.block_domains)
+        return replace(profile, blocked_domains=profile.blocked_domains + extra_domains)
+
+    def classify_image(self, image: Path | bytes, name: str = "screenshot") -> tuple[str, str]:
+        """Classify one screenshot (a path, or encoded image bytes named `name` in logs). Returns (category, explanation)."""
+        from .analysis import analyze_website_aesthetic_categorized
+        if isinstance(image, bytes):
+            return analyze_website_aesthetic_categorized(Path(name), self.config.model, image_bytes=image, client=self.client)
+        return analyze_website_aesthetic_categorized(Path(image), self.config.model, client=self.client)
+
+    def dry_run(self) -> dict:
+        """
+        Plan a run without a browser, network or API key: count rows, invalid URLs, rows already
+        in the journal (with `resume`) and distinct sites. Raises FileNotFoundError or ValueError
+        if the input CSV is missing or has no 'website' column.
+        """
+        config = self.config
+        with open(config.input_csv, newline='', encoding='utf-8-sig') as csv_file:
+            reader = csv.DictReader(csv_file)
+            if 'website' not in (reader.fieldnames or []):
+                raise ValueError(f"CSV must contain a 'website' column. Found: {reader.fieldnames}")
+            rows = [(index, row['website'] or None) for index, row in enumerate(reader)]
+        done = ResultsJournal.read_records(config.journal_path) if config.resume and config.journal_path.exists() else {}
+        pending = [(index, url) for index, url in rows if (index, url) not in done]
+        valid = [url.strip() for _, url in pending if is_valid_url(url)]
+        sites = len({canonical_url_key(url) for url in valid})
+        return {
+            "input_csv": str(config.input_csv),
+            "rows": len(rows),
+            "already_done": len(rows) - len(pending),
+            "invalid_urls": len(pending) - len(valid),
+            "distinct_sites": sites,
+            "duplicates_folded": len(valid) - sites,
+            "model": config.model,
+            "browsers": config.browsers,
+            "optimize_workers": config.optimize_workers,
+            "max_in_flight": config.max_in_flight,
+            "batch_size": config.batch_size,
+            "preflight": config.preflight,
+            "capture_profile": config.capture_profile,
+            "preclassify": config.preclassify,
+        }
+
+    def run(self, on_job=None):
+        """
+        Analyze every row of the input CSV and write the output CSV. Returns the results DataFrame,
+        or None if the input could not be read.
+
+        `on_job(job)` is called with every finished SiteJob, including sites settled by the
+        pre-flight probe. Raises ValueError if no OpenRouter API key is configured.
+        """
+        import multiprocessing
+        import pandas as pd
+        from concurrent.futures import ProcessPoolExecutor
+        from .analysis import AsyncAnalysisEngine, openrouter_settings
+        from .browser import BrowserPool
+        from .cache import VerdictCache
+        from .logs import configure_worker_logging
+        from .pipeline import ScreenshotWriter, run_pipeline
+        from .planning import plan_site_jobs
+        from .preclassify import Preclassifier
+        from .results import RunTracer
+
+        config = self.config
+        api_key, base_url = openrouter_settings(config.api_key, config.base_url)
+        script_start_time = time.perf_counter()
+        logger.info("--- Starting website_analyzer (OpenRouter mode) run ---")
+        logger.info(f"Using OpenRouter model: {config.model}")
+
+        if not config.input_csv.exists():
+            logger.error(f"Input CSV file '{config.input_csv}' not found.")
+            return None
+        try:
+            df = pd.read_csv(config.input_csv)
+            logger.info(f"Successfully loaded {len(df)} rows from {config.input_csv}")
+        except Exception as e:
+            logger.error(f"Error reading CSV file '{config.input_csv}': {e}", exc_info=True)
+            return None
+        if 'website' not in df.columns:
+            logger.error(f"CSV must contain a 'website' column. Found: {df.columns.tolist()}")
+            return None
+
+        df['aesthetic_category'] = "Not Processed"
+        df['aesthetic_explanation'] = "Not Processed"
+        df['screenshot_path'] = ""
+        df['openrouter_model_used'] = config.model # Add column for model used
+
+        total_rows = len(df)
+        journal = ResultsJournal(config.journal_path, resume=config.resume)
+        processed_rows = 0
+        pending_rows = []
+        titles = df['title'] if 'title' in df.columns else [f"website_{index}" for index in df.index]
+        for index, website_url, business_title in zip(df.index, df['website'], titles):
+            if journal.is_done(index, website_url):
+                processed_rows += 1
+                continue
+
+            if pd.isna(website_url) or not is_valid_url(website_url):
+                logger.warning(f"Invalid or missing URL: '{website_url}' for '{business_title}'. Skipping analysis.")
+                journal.append(index, website_url, "", "Invalid URL", "URL was not valid for processing.")
+                processed_rows += 1
+                continue
+
+            pending_rows.append((index, website_url, business_title))
+
+        if config.resume:
+            logger.info(f"{processed_rows}/{total_rows} rows already done, {len(pending_rows)} rows left to process")
+        # Enough analyze threads to keep every in-flight request's batch full
+        analyze_workers = config.max_in_flight * max(1, config.batch_size)
+        tracer = RunTracer(config.trace_path, {"capture": config.browsers, "optimize": config.optimize_workers,
+                                          "analyze": analyze_workers}, append=config.resume)
+        jobs = plan_site_jobs(pending_rows, preflight=config.preflight)
+        for job in [job for job in jobs if job.failed]: # Dead or parked: settled without a browser
+            for index, website_url in job.rows:
+                journal.append(index, website_url, "", job.category, job.explanation)
+            tracer.record(job)
+            if on_job:
+                on_job(job)
+            processed_rows += len(job.rows)
+        jobs = [job for job in jobs if not job.failed]
+
+        verdict_cache = VerdictCache(config.verdict_cache_path) if config.verdict_cache_path else None
+        screenshot_writer = None
+        if config.save_screenshots:
+            config.screenshots_dir.mkdir(parents=True, exist_ok=True)
+            screenshot_writer = ScreenshotWriter()
+        engine = AsyncAnalysisEngine(config.model, base_url=base_url, api_key=api_key,
+                                     requests_per_second=config.requests_per_second,
+                                     initial_concurrency=min(config.initial_in_flight, config.max_in_flight),
+                                     max_concurrency=config.max_in_flight, batch_size=config.batch_size)
+        capture_profile = self.capture_profile()
+        preclassifier = Preclassifier(audit_every=config.preclassify_audit_every) if config.preclassify else None
+        lean_totals = {"sites": 0, "blocked": 0, "bytes_saved": 0, "load_ms_saved": 0}
+
+        try:
+            # Spawn (not fork) the optimizer processes: forking while browser/stage threads run is unsafe.
+            with BrowserPool(config.browsers, config.max_pages_per_context) as pool, \
+                    ProcessPoolExecutor(max_workers=config.optimize_workers, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=configure_worker_logging,
+                                        initargs=(logging.getLogger().getEffectiveLevel(),)) as executor:
+                for job in run_pipeline(jobs, pool, executor, engine, verdict_cache, screenshot_writer,
+                                        capture_profile=capture_profile, image_encoding=self.image_encoding(),
+                                        screenshots_dir=config.screenshots_dir, preclassifier=preclassifier,
+                                        optimize_workers=config.optimize_workers, analyze_workers=analyze_workers):
+                    # Only point the CSV at screenshots that actually reached the disk
+                    saved_path = str(job.screenshot_path) if job.screenshot_saved and job.screenshot_saved.result() else ""
+                    for index, website_url in job.rows:
+                        journal.append(index, website_url, saved_path, job.category, job.explanation)
+                    tracer.record(job)
+                    if on_job:
+                        on_job(job)
+                    if job.lean:
+                        lean_totals["sites"] += 1
+                        for key in ("blocked", "bytes_saved", "load_ms_saved"):
+                            lean_totals[key] += job.lean.get(key, 0)
+                    processed_rows += len(job.rows)
+                    stage_timings = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in job.timings.items())
+                    if job.settle:
+                        stage_timings += f", settled by {job.settle['ended_by']}"
+                    logger.info(f"Completed {processed_rows}/{total_rows} rows ({job.url}, {len(job.rows)} rows). "
+                                f"Category: {job.category} [{stage_timings}]")
+        except KeyboardInterrupt:
+            logger.warning(f"Interrupted after {processed_rows}/{total_rows} rows. Finished rows are in {config.journal_path}; "
+                           f"rerun with --resume to continue.")
+        finally:
+            journal.close()
+            tracer.close()
+            engine.close()
+            if screenshot_writer:
+                screenshot_writer.close()
+
+        if lean_totals["sites"]:
+            logger.info(f"Lean capture ({capture_profile.name}): {lean_totals['blocked']} requests blocked on {lean_totals['sites']} sites, "
+                        f"~{lean_totals['bytes_saved'] / (1024 * 1024):.1f}MB and ~{lean_totals['load_ms_saved'] / 1000:.0f}s of load time saved "
+                        f"(measured on {capture_profile.sampled_sites} baseline samples)")
+
+        run_summary = tracer.write_summary(config.summary_path)
+        utilization = ", ".join(f"{name} {stage['utilization']:.0%}" for name, stage in run_summary["stages"].items()
+                                if "utilization" in stage)
+        logger.info(f"Run summary written to {config.summary_path}; spans in {config.trace_path}. Stage utilization: {utilization or 'n/a'}"
+                    + (f" -> bound by {run_summary['bound_by']}" if run_summary["bound_by"] else ""))
+        if config.prometheus_textfile:
+            tracer.write_prometheus(config.prometheus_textfile, run_summary)
+            logger.info(f"Prometheus metrics written to {config.prometheus_textfile}")
+
+        if preclassifier:
+            local_stats = preclassifier.stats()
+            agreement = (f"{local_stats['agreement_rate']:.1%} agreement with the model on {local_stats['compared']} audited"
+                         if local_stats["compared"] else "no audited verdicts to measure agreement")
+            logger.info(f"Pre-classifier: {local_stats['local']} sites settled locally as Outdated "
+                        f"({local_stats['api_calls_saved']} model calls saved), {local_stats['ambiguous']} left to the model; {agreement}")
+            if local_stats["compared"] and local_stats["agreement_rate"] < 0.8:
+                logger.warning("Pre-classifier agreement is below 80%; consider --no-preclassify or a higher PRECLASSIFY_OUTDATED_SCORE.")
+
+        if verdict_cache:
+            cache_stats = verdict_cache.stats()
+            logger.info(f"Verdict cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                        f"({cache_stats['hit_rate']:.1%} hit rate), {cache_stats['entries']} entries stored")
+            verdict_cache.close()
+
+        journal.merge_into(df)
+        try:
+            df.to_csv(config.output_csv, index=False, encoding='utf-8')
+            logger.info(f"Analysis complete. Results saved to {config.output_csv}")
+        except Exception as e:
+            logger.error(f"Error saving output CSV '{config.output_csv}': {e}", exc_info=True)
+
+        logger.info(f"--- website_analyzer (OpenRouter mode) run finished. Total duration: {time.perf_counter() - script_start_time:.4f}s ---")
+        return df
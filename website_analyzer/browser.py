@@ -0,0 +1,457 @@
+"""Headless Chromium capture: the browser pool, page settling and capture profiles."""
+import logging
+import queue
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+
+from playwright.sync_api import sync_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from .config import (BROWSER_MAX_PAGES_PER_CONTEXT, BROWSER_POOL_SIZE, BROWSER_USER_AGENT, BROWSER_VIEWPORT,
+                     LEAN_BASELINE_EVERY, LEAN_BLOCKED_DOMAINS, LEAN_BLOCKED_RESOURCE_TYPES, LEAN_MAX_PAGE_HEIGHT,
+                     NAVIGATION_TIMEOUT_MS, PAGE_SIGNALS_MAX_ELEMENTS, SETTLE_BUDGET_SECONDS, SETTLE_DOM_QUIET_MS, SETTLE_MAX_SCROLLS)
+from .images import optimize_screenshot
+
+logger = logging.getLogger(__name__)
+
+class BrowserPool:
+    """
+    Long-lived pool of headless Chromium workers, each holding a reusable context and page.
+
+    Playwright's sync API is bound to the thread that started it, so every slot runs on its
+    own thread with its own browser. Jobs are callables that receive the slot's page as their
+    first argument. A slot recycles its context after `max_pages_per_context` captures and
+    relaunches its browser when it crashes or disconnects.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_pages_per_context: int = BROWSER_MAX_PAGES_PER_CONTEXT):
+        self.size = size
+        self.max_pages_per_context = max_pages_per_context
+        self._jobs = queue.Queue(maxsize=size * 2)
+        self._threads = [
+            threading.Thread(target=self._run_slot, args=(slot_id,), name=f"browser-{slot_id}", daemon=True)
+            for slot_id in range(size)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Browser pool started with {size} workers (recycle after {max_pages_per_context} pages)")
+
+    def submit(self, fn, *args) -> Future:
+        """Queue `fn(page, *args)` on the next free browser slot. Blocks while the pool is saturated."""
+        future = Future()
+        self._jobs.put((fn, args, future))
+        return future
+
+    def close(self):
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        logger.info("Browser pool shut down.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run_slot(self, slot_id: int):
+        with sync_playwright() as p:
+            browser = None
+            context = None
+            page = None
+            pages_served = 0
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                fn, args, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                crashed = False # Launch or context creation failed
+                try:
+                    if browser is None or not browser.is_connected():
+                        self._close_quietly(browser)
+                        logger.info(f"Browser slot {slot_id}: launching Chromium")
+                        browser = p.chromium.launch(headless=True)
+                        context = None
+                    if context is None or pages_served >= self.max_pages_per_context:
+                        self._close_quietly(context)
+                        logger.debug(f"Browser slot {slot_id}: creating new context after {pages_served} pages")
+                        context = browser.new_context(user_agent=BROWSER_USER_AGENT, viewport=BROWSER_VIEWPORT)
+                        page = context.new_page()
+                        pages_served = 0
+                except Exception as e:
+                    crashed = True
+                    future.set_exception(e)
+                if not crashed:
+                    pages_served += 1
+                    try:
+                        future.set_result(fn(page, *args))
+                    except Exception as e:
+                        future.set_exception(e)
+                # A job's own errors (navigation timeouts, bad URLs) keep the context; recycle only when
+                # the page, context or browser actually died
+                if crashed or page is None or page.is_closed() or not browser.is_connected():
+                    logger.warning(f"Browser slot {slot_id}: page or browser unusable, recycling.")
+                    self._close_quietly(context)
+                    context = None
+                    if browser is not None and not browser.is_connected():
+                        browser = None
+            self._close_quietly(browser)
+
+    @staticmethod
+    def _close_quietly(resource):
+        if resource is None:
+            return
+        try:
+            resource.close()
+        except Exception as e:
+            logger.debug(f"Ignoring error while closing {type(resource).__name__}: {e}")
+
+# Runs inside the page. Resolves with a report once fonts are ready, incremental scrolling
+# stops finding new content, images have finished loading and the DOM has been quiet for
+# quietMs -- or when the budget runs out. `ended_by` names the signal that was satisfied last.
+SETTLE_SCRIPT = """
+async ({quietMs, budgetMs, maxScrolls}) => {
+    const start = performance.now();
+    const deadline = start + budgetMs;
+    const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+    const timeLeft = () => Math.max(0, deadline - performance.now());
+    const report = {signals: {}, scrolls: 0, ended_by: "budget"};
+    const mark = name => { report.signals[name] = Math.round(performance.now() - start); report.ended_by = name; };
+
+    let lastMutation = performance.now();
+    const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+    observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+
+    if (document.fonts && await Promise.race([document.fonts.ready.then(() => true), sleep(timeLeft()).then(() => false)])) {
+        mark("fonts");
+    }
+
+    // Scroll one viewport at a time to trigger lazy loading; stop once the bottom stops moving.
+    let y = 0;
+    while (timeLeft() > 0 && report.scrolls < maxScrolls) {
+        const heightBefore = document.documentElement.scrollHeight;
+        y = Math.min(y + window.innerHeight, heightBefore);
+        window.scrollTo(0, y);
+        report.scrolls += 1;
+        await sleep(Math.min(150, timeLeft()));
+        const atBottom = y + window.innerHeight >= document.documentElement.scrollHeight;
+        if (atBottom && document.documentElement.scrollHeight === heightBefore) {
+            mark("scroll_end");
+            break;
+        }
+    }
+    window.scrollTo(0, 0);
+
+    const pendingImages = () => Array.from(document.images).filter(img => !img.complete).length;
+    while (timeLeft() > 0 && pendingImages() > 0) {
+        await sleep(Math.min(100, timeLeft()));
+    }
+    if (pendingImages() === 0) {
+        mark("images");
+    }
+
+    while (timeLeft() > 0 && performance.now() - lastMutation < quietMs) {
+        await sleep(Math.min(100, timeLeft()));
+    }
+    if (performance.now() - lastMutation >= quietMs) {
+        mark("dom_quiet");
+    }
+    observer.disconnect();
+
+    if (timeLeft() === 0) {
+        report.ended_by = "budget";
+    }
+    report.pending_images = pendingImages();
+    report.elapsed_ms = Math.round(performance.now() - start);
+    return report;
+}
+"""
+
+# Runs inside the settled page. Cheap markup signals that the pre-classifier weighs: legacy tags
+# and plugins, layout tables, the newest copyright year in the footer text and modern CSS usage.
+PAGE_SIGNALS_SCRIPT = """
+(maxElements) => {
+    const count = selector => document.querySelectorAll(selector).length;
+    const footerText = document.body ? document.body.innerText.slice(-4000) : "";
+    const years = Array.from(footerText.matchAll(/(?:\u00a9|\(c\)|copyright)\s*(?:(?:19|20)\d{2}\s*[-\u2013]\s*)?((?:19|20)\d{2})/gi),
+                             match => Number(match[1]));
+    let flexGrid = 0;
+    for (const element of Array.from(document.querySelectorAll("body *")).slice(0, maxElements)) {
+        const display = getComputedStyle(element).display;
+        if (display.includes("flex") || display.includes("grid")) {
+            flexGrid += 1;
+        }
+    }
+    const generator = document.querySelector('meta[name="generator" i]');
+    return {
+        viewport_meta: document.querySelector('meta[name="viewport" i]') !== null,
+        flash: count('object[type*="shockwave" i], embed[type*="shockwave" i], embed[src*=".swf" i], object[data*=".swf" i], param[value*=".swf" i]'),
+        frames: count("frameset, frame"),
+        marquee: count("marquee, blink"),
+        font_tags: count("font, center, basefont"),
+        nested_tables: count("table table"),
+        spacer_images: count('img[src*="spacer" i], img[src*="blank.gif" i], img[src*="pixel.gif" i]'),
+        generator: generator ? generator.content.slice(0, 80) : null,
+        copyright_year: years.length ? Math.max(...years) : null,
+        flex_grid: flexGrid,
+        web_fonts: document.fonts ? Array.from(document.fonts).filter(font => font.status === "loaded").length : 0,
+    };
+}
+"""
+
+@dataclass
+class CaptureResult:
+    """What capture_page() brings back from the browser."""
+    png: bytes
+    settle: dict # SETTLE_SCRIPT report: which signals fired, when, and which one ended the wait
+    lean: dict | None = None # Blocking and savings report when a blocking CaptureProfile was used
+    signals: dict | None = None # PAGE_SIGNALS_SCRIPT report, when asked for
+
+def collect_page_signals(page, url: str) -> dict:
+    """Markup signals of the loaded page for the pre-classifier; empty if the page can't be evaluated."""
+    try:
+        return page.evaluate(PAGE_SIGNALS_SCRIPT, PAGE_SIGNALS_MAX_ELEMENTS)
+    except PlaywrightError as e:
+        logger.debug(f"Could not collect page signals on {url}: {e}")
+        return {}
+
+def settle_page(page, url: str, budget_seconds: float = SETTLE_BUDGET_SECONDS) -> dict:
+    """Wait until the page looks finished (see SETTLE_SCRIPT), bounded by a per-site time budget."""
+    settle_start_time = time.perf_counter()
+    try:
+        report = page.evaluate(SETTLE_SCRIPT, {
+            "quietMs": SETTLE_DOM_QUIET_MS,
+            "budgetMs": int(budget_seconds * 1000),
+            "maxScrolls": SETTLE_MAX_SCROLLS,
+        })
+    except PlaywrightError as e:
+        # Usually a client-side redirect tore down the execution context mid-wait
+        logger.debug(f"Settle script interrupted on {url}: {e}")
+        try:
+            page.wait_for_load_state("load", timeout=budget_seconds * 1000)
+        except PlaywrightError:
+            pass
+        report = {"signals": {}, "scrolls": 0, "ended_by": "navigation"}
+    report["elapsed_ms"] = round((time.perf_counter() - settle_start_time) * 1000)
+    logger.debug(f"Page {url} settled by '{report['ended_by']}' after {report['elapsed_ms']}ms "
+                  f"({report['scrolls']} scrolls, signals: {report['signals']})")
+    return report
+
+def _site_of(host: str) -> str:
+    """Rough registrable domain (last two labels), enough to tell first- from third-party frames."""
+    return ".".join(host.split(".")[-2:])
+
+@dataclass
+class CaptureProfile:
+    """
+    What to block or stub while capturing, and how tall a screenshot may get.
+
+    Blocked scripts are stubbed with an empty 200 response so pages don't trip over a failed
+    load; everything else blocked is aborted. Because blocked bytes are never downloaded, savings
+    are measured by also loading every `baseline_every`-th site unblocked, and estimated for the
+    other sites from the average saving per blocked request seen in those samples.
+    """
+    name: str
+    blocked_resource_types: frozenset = frozenset()
+    blocked_domains: tuple = ()
+    block_third_party_frames: bool = False
+    max_page_height: int | None = None
+    baseline_every: int = 0
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._captures = 0
+        self.sampled_sites = 0
+        self._sampled_blocked = 0
+        self._sampled_bytes_saved = 0
+        self._sampled_ms_saved = 0.0
+
+    @property
+    def blocks_anything(self) -> bool:
+        return bool(self.blocked_resource_types or self.blocked_domains or self.block_third_party_frames)
+
+    def block_class(self, request, main_host: str) -> str | None:
+        """Why `request` should be blocked ('media', 'blocked_domain', 'third_party_frame', ...), or None."""
+        if request.resource_type in self.blocked_resource_types:
+            return request.resource_type
+        host = (urllib.parse.urlsplit(request.url).hostname or "").lower()
+        if any(host == domain or host.endswith("." + domain) for domain in self.blocked_domains):
+            return "blocked_domain"
+        if self.block_third_party_frames and request.resource_type == "document":
+            try:
+                is_subframe = request.frame.parent_frame is not None
+            except PlaywrightError:
+                is_subframe = False
+            if is_subframe and _site_of(host) != _site_of(main_host):
+                return "third_party_frame"
+        return None
+
+    def next_is_baseline(self) -> bool:
+        with self._lock:
+            self._captures += 1
+            return bool(self.baseline_every) and (self._captures - 1) % self.baseline_every == 0
+
+    def record_baseline(self, blocked: int, bytes_saved: int, ms_saved: float):
+        with self._lock:
+            self.sampled_sites += 1
+            self._sampled_blocked += blocked
+            self._sampled_bytes_saved += bytes_saved
+            self._sampled_ms_saved += ms_saved
+
+    def estimate_savings(self, blocked: int) -> tuple[int, float] | None:
+        with self._lock:
+            if not self._sampled_blocked:
+                return None
+            return (round(blocked * self._sampled_bytes_saved / self._sampled_blocked),
+                    blocked * self._sampled_ms_saved / self._sampled_blocked)
+
+CAPTURE_PROFILES = {
+    "full": CaptureProfile("full"),
+    "lean": CaptureProfile(
+        "lean",
+        blocked_resource_types=LEAN_BLOCKED_RESOURCE_TYPES,
+        blocked_domains=LEAN_BLOCKED_DOMAINS,
+        block_third_party_frames=True,
+        max_page_height=LEAN_MAX_PAGE_HEIGHT,
+        baseline_every=LEAN_BASELINE_EVERY,
+    ),
+}
+
+def _load_page(page, url: str, profile: CaptureProfile | None, block: bool) -> tuple[dict, dict]:
+    """Navigate and settle, counting responses and (if `block`) blocking per `profile`. Returns (settle, load stats)."""
+    stats = {"requests": 0, "bytes_loaded": 0, "blocked": {}}
+    main_host = (urllib.parse.urlsplit(url).hostname or "").lower()
+
+    def on_response(response):
+        stats["requests"] += 1
+        length = response.headers.get("content-length", "")
+        if length.isdigit():
+            stats["bytes_loaded"] += int(length)
+
+    def handle_route(route):
+        request = route.request
+        block_class = profile.block_class(request, main_host) if block else None
+        if block_class is None:
+            route.continue_()
+            return
+        stats["blocked"][block_class] = stats["blocked"].get(block_class, 0) + 1
+        if request.resource_type == "script":
+            route.fulfill(status=200, content_type="application/javascript", body="")
+        else:
+            route.abort("blockedbyclient")
+
+    # Routing also disables the HTTP cache, which keeps lean and baseline loads comparable.
+    routed = profile is not None and profile.blocks_anything
+    page.on("response", on_response)
+    if routed:
+        page.route("**/*", handle_route)
+    try:
+        logger.debug(f"Navigating to {url}...")
+        page_goto_start = time.perf_counter()
+        page.goto(url, timeout=NAVIGATION_TIMEOUT_MS, wait_until="domcontentloaded")
+        logger.debug(f"Navigation to {url} complete. Took {time.perf_counter() - page_goto_start:.4f}s")
+        settle = settle_page(page, url)
+        stats["load_ms"] = round((time.perf_counter() - page_goto_start) * 1000)
+    finally:
+        if routed:
+            page.unroute("**/*", handle_route)
+        page.remove_listener("response", on_response)
+    return settle, stats
+
+def capture_page(page, url: str, screenshot_path: Path | None = None,
+                 profile: CaptureProfile | None = None, signals: bool = False) -> CaptureResult:
+    """
+    Load `url`, let it settle and take a full-page PNG screenshot. Also writes the PNG if a path is given.
+    With `signals`, CaptureResult.signals also carries the page's markup signals (see PAGE_SIGNALS_SCRIPT).
+
+    With a blocking `profile`, heavy or irrelevant requests are blocked, the screenshot height is
+    capped and CaptureResult.lean reports what was blocked and the bytes and load time saved.
+    """
+    lean = None
+    if profile is not None and profile.blocks_anything:
+        baseline = None
+        if profile.next_is_baseline():
+            _, baseline = _load_page(page, url, profile, block=False)
+        settle, stats = _load_page(page, url, profile, block=True)
+        blocked = sum(stats["blocked"].values())
+        lean = {
+            "profile": profile.name,
+            "blocked": blocked,
+            "blocked_by_class": stats["blocked"],
+            "requests": stats["requests"],
+            "bytes_loaded": stats["bytes_loaded"],
+            "load_ms": stats["load_ms"],
+            "savings": "unknown",
+        }
+        if baseline is not None:
+            lean["bytes_saved"] = max(0, baseline["bytes_loaded"] - stats["bytes_loaded"])
+            lean["load_ms_saved"] = max(0, baseline["load_ms"] - stats["load_ms"])
+            lean["savings"] = "measured"
+            profile.record_baseline(blocked, lean["bytes_saved"], lean["load_ms_saved"])
+        else:
+            estimate = profile.estimate_savings(blocked)
+            if estimate:
+                lean["bytes_saved"], lean["load_ms_saved"] = estimate[0], round(estimate[1])
+                lean["savings"] = "estimated"
+    else:
+        settle, _ = _load_page(page, url, profile, block=False)
+    page_signals = collect_page_signals(page, url) if signals else None
+
+    logger.debug(f"Taking screenshot for {url}...")
+    screenshot_take_start = time.perf_counter()
+    screenshot_options = {"path": screenshot_path, "full_page": True} # Still use full_page for simplicity
+    if profile is not None and profile.max_page_height:
+        page_height = page.evaluate("document.documentElement.scrollHeight")
+        if page_height > profile.max_page_height:
+            screenshot_options["clip"] = {"x": 0, "y": 0, "width": page.viewport_size["width"], "height": profile.max_page_height}
+    png_bytes = page.screenshot(**screenshot_options)
+    logger.debug(f"Screenshot for {url} taken ({len(png_bytes) / 1024:.0f} KB). Took {time.perf_counter() - screenshot_take_start:.4f}s")
+    if lean:
+        logger.info(f"Lean capture of {url}: blocked {lean['blocked']} requests {lean['blocked_by_class']}, "
+                     f"saved {lean.get('bytes_saved', 0) / 1024:.0f} KB / {lean.get('load_ms_saved', 0)} ms ({lean['savings']})")
+    return CaptureResult(png_bytes, settle, lean, page_signals)
+
+def take_and_optimize_screenshot(url: str, base_filepath_name: str,
+                                 screenshots_dir: Path, max_width: int, jpeg_quality: int, page=None) -> Path | None:
+    """Capture and optimize a screenshot. Uses `page` from a BrowserPool if given, otherwise a one-off browser."""
+    logger.info(f"Attempting screenshot and optimization for URL: {url}")
+    overall_ss_opt_start_time = time.perf_counter()
+    original_screenshot_path = screenshots_dir / f"{base_filepath_name}_temp.png"
+    optimized_screenshot_path = screenshots_dir / f"{base_filepath_name}.jpg"
+
+    if not isinstance(url, str) or not (url.startswith('http://') or url.startswith('https://')):
+        logger.warning(f"Invalid or missing URL for screenshot: {url}. Skipping.")
+        return None
+    try:
+        if page is None:
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=True)
+                context = browser.new_context(user_agent=BROWSER_USER_AGENT, viewport=BROWSER_VIEWPORT)
+                capture_page(context.new_page(), url, original_screenshot_path)
+                browser.close()
+        else:
+            capture_page(page, url, original_screenshot_path)
+
+        if optimize_screenshot(original_screenshot_path, optimized_screenshot_path, max_width, jpeg_quality):
+            logger.info(f"Screenshot and optimization for {url} successful. Total time: {time.perf_counter() - overall_ss_opt_start_time:.4f}s")
+            return optimized_screenshot_path
+        else:
+            logger.error(f"Optimization failed for {original_screenshot_path}. It might have been deleted.")
+            return None
+    except PlaywrightTimeoutError:
+        logger.error(f"Playwright timeout for {url}.", exc_info=True)
+        return None
+    except Exception as e:
+        logger.error(f"General error taking/optimizing screenshot for {url}: {e}", exc_info=True)
+        if original_screenshot_path.exists():
+            try:
+                original_screenshot_path.unlink()
+            except OSError:
+                pass
+        return None
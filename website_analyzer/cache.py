@@ -0,0 +1,116 @@
+"""Perceptual hashing and the on-disk SQLite verdict cache."""
+import hashlib
+import io
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from .config import VERDICT_CACHE_MAX_ENTRIES, VERDICT_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+def perceptual_hash(image: Path | bytes, hash_size: int = 16) -> str:
+    """Difference hash (dHash) of an image: robust to re-encoding noise, changes when the page changes."""
+    with Image.open(io.BytesIO(image) if isinstance(image, bytes) else image) as img:
+        small = img.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+class VerdictCache:
+    """
+    On-disk SQLite cache of LLM verdicts keyed on screenshot content, model and prompt.
+
+    Keys combine a perceptual hash of the optimized screenshot with the model name and a
+    SHA-256 of the prompt, so a changed site, model or prompt is a miss. Entries expire after
+    `ttl_seconds`, and the least recently used are evicted beyond `max_entries`.
+    Safe to share between analyze threads.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: int = VERDICT_CACHE_TTL_SECONDS,
+                 max_entries: int = VERDICT_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            " key TEXT PRIMARY KEY, model TEXT, category TEXT, explanation TEXT,"
+            " created_at REAL, last_used_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS verdicts_last_used ON verdicts (last_used_at)")
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(image: Path | bytes, model_name: str, prompt_text: str) -> str:
+        prompt_hash = hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()
+        return f"{perceptual_hash(image)}:{model_name}:{prompt_hash}"
+
+    def get(self, key: str) -> tuple[str, str] | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT category, explanation FROM verdicts WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE verdicts SET last_used_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0], row[1]
+
+    def put(self, key: str, model_name: str, category: str, explanation: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, model, category, explanation, created_at, last_used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, category, explanation, now, now),
+            )
+            self._conn.commit()
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= 100
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        with self._lock:
+            expired = self._conn.execute(
+                "DELETE FROM verdicts WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            overflow = self._conn.execute(
+                "DELETE FROM verdicts WHERE key IN ("
+                " SELECT key FROM verdicts ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+            self._puts_since_evict = 0
+        if expired or overflow:
+            logger.info(f"Verdict cache evicted {expired} expired and {overflow} least recently used entries")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": hit_rate, "entries": entries}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,143 @@
+"""
+Command-line entry point: python -m website_analyzer [options].
+
+Only argparse and the package's light modules are imported here; the Analyzer pulls in pandas,
+Playwright, OpenAI and Pillow when a real run starts, so --help and --dry-run return quickly.
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+
+from .analyzer import Analyzer
+from .config import (ANALYZE_BATCH_SIZE, ANALYZE_MAX_IN_FLIGHT, ANALYZE_REQUESTS_PER_SECOND, BROWSER_POOL_SIZE,
+                     CAPTURE_PROFILE, INPUT_CSV_PATH, LOG_FILE, OPENROUTER_MODEL_NAME, OPTIMIZE_WORKERS,
+                     OPTIMIZED_IMAGE_FORMAT, OPTIMIZED_IMAGE_MAX_VIEWPORTS, OPTIMIZED_IMAGE_TARGET_BYTES,
+                     OPTIMIZED_IMAGE_TILE, OUTPUT_CSV_PATH, PRECLASSIFY, PRECLASSIFY_AUDIT_EVERY, PREFLIGHT_PROBE, PROMETHEUS_TEXTFILE_PATH, SAVE_SCREENSHOTS,
+                     SCREENSHOTS_DIR, VERDICT_CACHE_PATH, AnalyzerConfig)
+from .logs import configure_logging
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_PROFILE_NAMES = ["full", "lean"] # Keys of browser.CAPTURE_PROFILES (not imported here: it needs Playwright)
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="website_analyzer",
+                                     description="Screenshot websites from a Google Maps export and classify their aesthetic via OpenRouter.")
+    parser.add_argument("--input", type=Path, default=Path(INPUT_CSV_PATH),
+                        help="CSV export with a 'website' (and optionally 'title') column (default: %(default)s)")
+    parser.add_argument("--output", type=Path, default=Path(OUTPUT_CSV_PATH),
+                        help="Where the analyzed CSV is written (default: %(default)s)")
+    parser.add_argument("--model", default=OPENROUTER_MODEL_NAME, help="OpenRouter model to classify with (default: %(default)s)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only plan the run: count rows, invalid URLs, finished rows and distinct sites, then exit")
+    parser.add_argument("--journal", type=Path, default=None,
+                        help="JSONL file that each finished row is appended to (default: <output>.journal.jsonl)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip rows already recorded in the journal instead of starting over")
+    concurrency = parser.add_argument_group("concurrency")
+    concurrency.add_argument("--browsers", type=int, default=BROWSER_POOL_SIZE,
+                             help="Chromium workers capturing sites at once (default: %(default)s)")
+    concurrency.add_argument("--optimize-workers", type=int, default=OPTIMIZE_WORKERS,
+                             help="Processes encoding screenshots (default: %(default)s)")
+    concurrency.add_argument("--max-in-flight", type=int, default=ANALYZE_MAX_IN_FLIGHT,
+                             help="Upper bound on concurrent OpenRouter requests (default: %(default)s)")
+    concurrency.add_argument("--requests-per-second", type=float, default=ANALYZE_REQUESTS_PER_SECOND,
+                             help="Starting OpenRouter request rate; adapts to rate-limit headers (default: %(default)s)")
+    concurrency.add_argument("--batch-size", type=int, default=ANALYZE_BATCH_SIZE,
+                             help="Screenshots to classify per OpenRouter request (default: %(default)s)")
+    capture = parser.add_argument_group("capture and encoding")
+    capture.add_argument("--preflight", action=argparse.BooleanOptionalAction, default=PREFLIGHT_PROBE,
+                         help="Probe URLs over HTTP first: follow redirects and skip dead or parked sites (default: %(default)s)")
+    capture.add_argument("--capture-profile", choices=CAPTURE_PROFILE_NAMES, default=CAPTURE_PROFILE,
+                         help="'lean' blocks media, trackers, ads, chat widgets and third-party iframes and caps page height "
+                              "(default: %(default)s)")
+    capture.add_argument("--block-domain", action="append", default=[], metavar="DOMAIN",
+                         help="Extra domain to block during capture, added to the selected profile (repeatable)")
+    capture.add_argument("--image-format", choices=["jpeg", "webp"], default=OPTIMIZED_IMAGE_FORMAT.lower(),
+                         help="Format of the screenshots sent for analysis (default: %(default)s)")
+    capture.add_argument("--target-kb", type=int, default=OPTIMIZED_IMAGE_TARGET_BYTES and OPTIMIZED_IMAGE_TARGET_BYTES // 1024,
+                         help="Lower image quality until each screenshot fits this many KB; 0 keeps a fixed quality (default: %(default)s)")
+    capture.add_argument("--max-viewports", type=int, default=OPTIMIZED_IMAGE_MAX_VIEWPORTS,
+                         help="Crop tall pages to the first N viewports; 0 keeps the whole page (default: %(default)s)")
+    capture.add_argument("--tile", action=argparse.BooleanOptionalAction, default=OPTIMIZED_IMAGE_TILE,
+                         help="Lay the kept viewports out side by side instead of as one tall image (default: %(default)s)")
+    preclassify = parser.add_argument_group("local pre-classification")
+    preclassify.add_argument("--preclassify", action=argparse.BooleanOptionalAction, default=PRECLASSIFY,
+                             help="Call obviously dated sites Outdated from page and screenshot signals without asking the model "
+                                  "(default: %(default)s)")
+    preclassify.add_argument("--audit-every", type=int, default=PRECLASSIFY_AUDIT_EVERY, metavar="N",
+                             help="Also ask the model about every Nth local verdict and log the agreement rate; 0 never does "
+                                  "(default: %(default)s)")
+    outputs = parser.add_argument_group("outputs")
+    outputs.add_argument("--save-screenshots", action=argparse.BooleanOptionalAction, default=SAVE_SCREENSHOTS,
+                         help="Write optimized screenshots to --screenshots-dir in the background (default: %(default)s)")
+    outputs.add_argument("--screenshots-dir", type=Path, default=SCREENSHOTS_DIR,
+                         help="Directory for saved screenshots (default: %(default)s)")
+    outputs.add_argument("--verdict-cache", type=Path, default=VERDICT_CACHE_PATH,
+                         help="SQLite cache of verdicts keyed on screenshot content (default: %(default)s)")
+    outputs.add_argument("--no-verdict-cache", dest="verdict_cache", action="store_const", const=None,
+                         help="Always ask the model, even for screenshots seen before")
+    outputs.add_argument("--trace", type=Path, default=None,
+                         help="JSONL file that gets one span per site (default: <output>.trace.jsonl)")
+    outputs.add_argument("--summary", type=Path, default=None,
+                         help="JSON run summary with per-stage latency histograms (default: <output>.summary.json)")
+    outputs.add_argument("--prometheus-textfile", type=Path, default=PROMETHEUS_TEXTFILE_PATH,
+                         help="Also write run metrics in node_exporter textfile format to this path")
+    outputs.add_argument("--log-file", default=LOG_FILE,
+                         help="Also append logs to this file; '' to log to stderr only (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def config_from_args(args: argparse.Namespace) -> AnalyzerConfig:
+    return AnalyzerConfig(
+        input_csv=args.input,
+        output_csv=args.output,
+        journal=args.journal,
+        trace=args.trace,
+        summary=args.summary,
+        prometheus_textfile=args.prometheus_textfile,
+        resume=args.resume,
+        model=args.model,
+        browsers=args.browsers,
+        optimize_workers=args.optimize_workers,
+        requests_per_second=args.requests_per_second,
+        max_in_flight=args.max_in_flight,
+        batch_size=args.batch_size,
+        preflight=args.preflight,
+        capture_profile=args.capture_profile,
+        block_domains=tuple(args.block_domain),
+        image_format=args.image_format,
+        image_target_bytes=args.target_kb * 1024 if args.target_kb else None,
+        image_max_viewports=args.max_viewports or None,
+        image_tile=args.tile,
+        save_screenshots=args.save_screenshots,
+        screenshots_dir=args.screenshots_dir,
+        verdict_cache_path=args.verdict_cache,
+        preclassify=args.preclassify,
+        preclassify_audit_every=args.audit_every,
+    )
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    configure_logging(args.log_file or None)
+    analyzer = Analyzer(config_from_args(args))
+
+    if args.dry_run:
+        try:
+            plan = analyzer.dry_run()
+        except (OSError, ValueError) as e:
+            logger.error(f"Dry run failed: {e}")
+            return 1
+        logger.info(f"Dry run: {plan['rows']} rows, {plan['already_done']} already done, {plan['invalid_urls']} invalid URLs, "
+                    f"{plan['distinct_sites']} distinct sites to capture ({plan['duplicates_folded']} duplicates folded)")
+        print(json.dumps(plan, indent=2))
+        return 0
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    try:
+        df = analyzer.run()
+    except ValueError as e:
+        logger.error(f"Error: {e}")
+        return 1
+    return 0 if df is not None else 1
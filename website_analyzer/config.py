@@ -0,0 +1,171 @@
+"""
+Default settings for the website analyzer.
+
+Plain constants only: importing this module reads no environment variables, touches no files
+and imports nothing heavy. AnalyzerConfig and the CLI flags start from these values.
+"""
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+LOG_FILE = "website_analyzer_openrouter.log"
+
+# Optional: Set a default model or get from .env
+DEFAULT_OPENROUTER_MODEL = "google/gemini-2.0-flash-lite-001"
+
+# Override (or set OPENROUTER_BASE_URL) to point at another OpenAI-compatible endpoint, e.g. a local fake server for testing
+DEFAULT_OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Good practice to set a referrer and a unique title for your app
+# For local scripts, referrer can be a simple identifier.
+# X-Title can be your project name.
+OPENROUTER_HEADERS = { # Optional, but good practice for OpenRouter
+    "HTTP-Referer": "https://github.com/yourusername/your-repo-name", # Replace with your actual repo or a project URL
+    "X-Title": "Website Aesthetic Analyzer", # Replace with your app name
+}
+
+# Configuration
+INPUT_CSV_PATH = "Google Map Scraper - Results.csv"
+OUTPUT_CSV_PATH = "Google_Map_Scraper_Results_OpenRouter_Analyzed.csv"
+RESULTS_JOURNAL_PATH = Path(f"{OUTPUT_CSV_PATH}.journal.jsonl") # One JSON line per finished row, used by --resume
+RUN_TRACE_PATH = Path(f"{OUTPUT_CSV_PATH}.trace.jsonl") # One span per site: stage timings, queue waits, bytes, retries
+RUN_SUMMARY_PATH = Path(f"{OUTPUT_CSV_PATH}.summary.json") # Per-stage latency histograms and utilization for the run
+PROMETHEUS_TEXTFILE_PATH = None # e.g. Path("/var/lib/node_exporter/website_analyzer.prom")
+TRACE_HISTOGRAM_BUCKETS_SECONDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SCREENSHOTS_DIR = Path("screenshots") # Changed dir name; created on first use
+
+OPTIMIZED_IMAGE_MAX_WIDTH = 1280
+OPTIMIZED_IMAGE_JPEG_QUALITY = 85 # Starting (and highest) quality; lowered only to meet the byte target
+OPTIMIZED_IMAGE_FORMAT = "JPEG" # "JPEG" or "WEBP"
+OPTIMIZED_IMAGE_TARGET_BYTES = 512 * 1024 # Binary-search quality down until the upload fits (None = fixed quality)
+OPTIMIZED_IMAGE_MIN_QUALITY = 40 # Never go below this quality, even if the target is missed
+OPTIMIZED_IMAGE_MAX_VIEWPORTS = 3 # Crop tall pages to the first N viewports before resizing (None = keep all)
+OPTIMIZED_IMAGE_TILE = False # Lay the kept viewports out side by side instead of as one tall strip
+OPTIMIZED_IMAGE_REDUCING_GAP = 3.0 # Pillow reduce()s by an integer factor first when downscaling by more than this
+SAVE_SCREENSHOTS = True # Write optimized JPEGs to SCREENSHOTS_DIR in the background (--no-save-screenshots to skip)
+
+# Browser pool configuration
+BROWSER_POOL_SIZE = 4 # Number of Chromium workers capturing sites concurrently
+BROWSER_MAX_PAGES_PER_CONTEXT = 50 # Recycle a worker's context/page after this many captures
+BROWSER_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+BROWSER_VIEWPORT = {'width': 1920, 'height': 3000} # Increased height to capture more content
+NAVIGATION_TIMEOUT_MS = 90000 # Until DOMContentLoaded; the settle budget below covers the rest
+SETTLE_BUDGET_SECONDS = 8 # Per-site cap on waiting for the page to finish after DOMContentLoaded
+SETTLE_DOM_QUIET_MS = 500 # The DOM counts as settled after this long without mutations
+SETTLE_MAX_SCROLLS = 20 # Viewport-sized scroll steps used to trigger lazy loading (stops early at the bottom)
+
+# Capture profiles: "full" loads everything; "lean" blocks resources irrelevant to an aesthetic verdict
+CAPTURE_PROFILE = "full"
+LEAN_BLOCKED_RESOURCE_TYPES = frozenset({"media", "websocket", "eventsource", "manifest", "texttrack"})
+LEAN_BLOCKED_DOMAINS = (
+    # Analytics and tag managers
+    "google-analytics.com", "analytics.google.com", "googletagmanager.com", "hotjar.com", "clarity.ms",
+    "segment.com", "segment.io", "mixpanel.com", "fullstory.com", "nr-data.net", "newrelic.com",
+    "quantserve.com", "scorecardresearch.com", "bat.bing.com", "hs-analytics.net", "hs-scripts.com",
+    # Ads and trackers
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "connect.facebook.net", "criteo.com", "adroll.com", "taboola.com", "outbrain.com",
+    # Chat and review widgets
+    "intercom.io", "intercomcdn.com", "drift.com", "driftt.com", "tawk.to", "zdassets.com", "zopim.com",
+    "livechatinc.com", "crisp.chat", "tidio.co", "olark.com", "podium.com", "birdeye.com",
+)
+LEAN_MAX_PAGE_HEIGHT = 6000 # Cap on full-page screenshot height in the lean profile (px)
+LEAN_BASELINE_EVERY = 20 # Also load every Nth site unblocked to measure savings (0 = never)
+
+# Planning configuration: rows are probed and grouped by canonical URL before any browser work
+PREFLIGHT_PROBE = True # Async HTTP probe that follows redirects and drops dead/parked sites before capture
+PROBE_CONCURRENCY = 100 # Connections open at once across all hosts
+PROBE_CONCURRENCY_PER_HOST = 4 # Connections open at once to any one host
+PROBE_TIMEOUT_SECONDS = 10
+PROBE_CONNECT_TIMEOUT_SECONDS = 5
+PROBE_DNS_CACHE_TTL_SECONDS = 600
+PROBE_MAX_BODY_BYTES = 64 * 1024 # Enough of the page to spot domain-parking templates
+
+# Pipeline configuration (capture concurrency is BROWSER_POOL_SIZE)
+OPTIMIZE_WORKERS = max(1, (os.cpu_count() or 2) - 1) # Processes running Pillow optimization
+ANALYZE_REQUESTS_PER_SECOND = 5.0 # Token-bucket ceiling; lowered automatically from rate-limit headers and 429s
+ANALYZE_INITIAL_IN_FLIGHT = 4 # Starting AIMD concurrency window for OpenRouter requests
+ANALYZE_MAX_IN_FLIGHT = 32 # Upper bound the AIMD window can grow to
+ANALYZE_MAX_RETRIES = 5
+ANALYZE_BATCH_SIZE = 1 # Screenshots per chat completion; >1 shares one prompt across several images
+ANALYZE_BATCH_LINGER_SECONDS = 1.0 # How long a partial batch waits for more screenshots before it is sent
+ANALYZE_WORKERS = ANALYZE_MAX_IN_FLIGHT # Pipeline threads handing screenshots to the async engine (x batch size)
+PIPELINE_QUEUE_SIZE = 16 # Max jobs buffered between two stages before the upstream stage blocks
+
+# Local pre-classification: obviously dated sites are called Outdated from page signals without an API call
+PRECLASSIFY = True
+PRECLASSIFY_OUTDATED_SCORE = 5.0 # Evidence score at or above which a site is settled locally...
+PRECLASSIFY_MIN_SIGNALS = 2 # ...provided at least this many independent dated signals contributed
+PRECLASSIFY_AUDIT_EVERY = 10 # Also send every Nth local verdict to the model to measure agreement (0 = never)
+PAGE_SIGNALS_MAX_ELEMENTS = 1500 # Elements whose computed style is sampled for flex/grid usage
+
+# Verdict cache configuration (set VERDICT_CACHE_PATH to None to disable)
+VERDICT_CACHE_PATH = Path("verdict_cache.sqlite3")
+VERDICT_CACHE_TTL_SECONDS = 30 * 24 * 3600 # Re-ask the model about a site after 30 days
+VERDICT_CACHE_MAX_ENTRIES = 50000 # Least recently used verdicts are evicted beyond this
+
+# OpenRouter Model Configuration - YOU CAN CHANGE THIS
+OPENROUTER_MODEL_NAME = DEFAULT_OPENROUTER_MODEL # Use the default or override here
+
+@dataclass
+class AnalyzerConfig:
+    """
+    Everything one Analyzer run needs, defaulting to the constants above.
+
+    Output-side paths left as None are derived from `output_csv` when read, through the
+    journal_path, trace_path and summary_path properties.
+    `api_key` and `base_url` fall back to OPENROUTER_API_KEY / OPENROUTER_BASE_URL when the
+    clients are created, not when the config is built.
+    """
+    input_csv: Path = Path(INPUT_CSV_PATH)
+    output_csv: Path = Path(OUTPUT_CSV_PATH)
+    journal: Path | None = None
+    trace: Path | None = None
+    summary: Path | None = None
+    prometheus_textfile: Path | None = PROMETHEUS_TEXTFILE_PATH
+    resume: bool = False
+    model: str = OPENROUTER_MODEL_NAME
+    api_key: str | None = None
+    base_url: str | None = None
+    # Concurrency
+    browsers: int = BROWSER_POOL_SIZE
+    max_pages_per_context: int = BROWSER_MAX_PAGES_PER_CONTEXT
+    optimize_workers: int = OPTIMIZE_WORKERS
+    requests_per_second: float = ANALYZE_REQUESTS_PER_SECOND
+    initial_in_flight: int = ANALYZE_INITIAL_IN_FLIGHT
+    max_in_flight: int = ANALYZE_MAX_IN_FLIGHT
+    batch_size: int = ANALYZE_BATCH_SIZE
+    # Capture and encoding
+    preflight: bool = PREFLIGHT_PROBE
+    capture_profile: str = CAPTURE_PROFILE
+    block_domains: tuple = ()
+    image_format: str = OPTIMIZED_IMAGE_FORMAT
+    image_target_bytes: int | None = OPTIMIZED_IMAGE_TARGET_BYTES
+    image_max_viewports: int | None = OPTIMIZED_IMAGE_MAX_VIEWPORTS
+    image_tile: bool = OPTIMIZED_IMAGE_TILE
+    save_screenshots: bool = SAVE_SCREENSHOTS
+    screenshots_dir: Path = SCREENSHOTS_DIR
+    verdict_cache_path: Path | None = VERDICT_CACHE_PATH
+    preclassify: bool = PRECLASSIFY
+    preclassify_audit_every: int = PRECLASSIFY_AUDIT_EVERY
+
+    def __post_init__(self):
+        self.input_csv = Path(self.input_csv)
+        self.output_csv = Path(self.output_csv)
+        self.journal = Path(self.journal) if self.journal else None
+        self.trace = Path(self.trace) if self.trace else None
+        self.summary = Path(self.summary) if self.summary else None
+
+    # Derived on read rather than in __post_init__, so dataclasses.replace(config, output_csv=...)
+    # moves the journal, trace and summary along with the output instead of copying the old paths
+    @property
+    def journal_path(self) -> Path:
+        return self.journal or Path(f"{self.output_csv}.journal.jsonl")
+
+    @property
+    def trace_path(self) -> Path:
+        return self.trace or Path(f"{self.output_csv}.trace.jsonl")
+
+    @property
+    def summary_path(self) -> Path:
+        return self.summary or Path(f"{self.output_csv}.summary.json")
@@ -0,0 +1,175 @@
+"""Screenshot encoding: cropping, downscaling and byte-budgeted JPEG/WebP output. Runs in the optimize process pool."""
+import base64
+import io
+import logging
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image
+
+from .config import (BROWSER_VIEWPORT, OPTIMIZED_IMAGE_FORMAT, OPTIMIZED_IMAGE_JPEG_QUALITY, OPTIMIZED_IMAGE_MAX_VIEWPORTS,
+                     OPTIMIZED_IMAGE_MAX_WIDTH, OPTIMIZED_IMAGE_MIN_QUALITY, OPTIMIZED_IMAGE_REDUCING_GAP,
+                     OPTIMIZED_IMAGE_TARGET_BYTES, OPTIMIZED_IMAGE_TILE)
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ImageEncoding:
+    """
+    How screenshots are shrunk before upload. Plain data, so it can be passed to the optimize process pool.
+
+    `viewport_height` is in screenshot pixels; with `max_viewports` set, anything below the first N
+    viewports is cropped off before resampling. `tile` lays those viewports out in a grid instead of
+    one tall strip, which suits vision models that downscale images to fit a square-ish box.
+    """
+    format: str = OPTIMIZED_IMAGE_FORMAT
+    max_width: int = OPTIMIZED_IMAGE_MAX_WIDTH
+    quality: int = OPTIMIZED_IMAGE_JPEG_QUALITY
+    target_bytes: int | None = OPTIMIZED_IMAGE_TARGET_BYTES
+    min_quality: int = OPTIMIZED_IMAGE_MIN_QUALITY
+    max_viewports: int | None = OPTIMIZED_IMAGE_MAX_VIEWPORTS
+    viewport_height: int = BROWSER_VIEWPORT["height"]
+    tile: bool = OPTIMIZED_IMAGE_TILE
+
+    @property
+    def extension(self) -> str:
+        return ".webp" if self.format.upper() == "WEBP" else ".jpg"
+
+def _prepare_image(img: Image.Image, encoding: ImageEncoding, name: str) -> Image.Image:
+    """Crop, convert and downscale `img` per `encoding`, doing as little full-resolution work as possible."""
+    logger.debug(f"Image {name} opened. Mode: {img.mode}, Size: {img.size}")
+    source_width = img.width
+    if img.format == "JPEG" and img.width > encoding.max_width:
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale straight away (no-op for PNG captures)
+        img.draft("RGB", (encoding.max_width, img.height * encoding.max_width // img.width))
+    viewport_height = max(1, encoding.viewport_height * img.width // source_width)
+    if encoding.max_viewports and img.height > viewport_height * encoding.max_viewports:
+        img = img.crop((0, 0, img.width, viewport_height * encoding.max_viewports))
+        logger.debug(f"Cropped {name} to the first {encoding.max_viewports} viewports.")
+    if img.mode not in ("RGB", "L"):
+         img = img.convert('RGB')
+         logger.debug(f"Converted image {name} to RGB.")
+    if img.width > encoding.max_width:
+        scale = encoding.max_width / img.width
+        img = img.resize((encoding.max_width, max(1, int(img.height * scale))), Image.Resampling.LANCZOS,
+                         reducing_gap=OPTIMIZED_IMAGE_REDUCING_GAP)
+        viewport_height = max(1, int(viewport_height * scale))
+    if encoding.tile and img.height > viewport_height:
+        tiles = [img.crop((0, top, img.width, min(top + viewport_height, img.height)))
+                 for top in range(0, img.height, viewport_height)]
+        columns = math.ceil(math.sqrt(len(tiles)))
+        rows = math.ceil(len(tiles) / columns)
+        sheet = Image.new(img.mode, (img.width * columns, viewport_height * rows), "white")
+        for position, tile in enumerate(tiles):
+            sheet.paste(tile, ((position % columns) * img.width, (position // columns) * viewport_height))
+        img = sheet
+        logger.debug(f"Tiled {name} into {len(tiles)} viewports ({columns}x{rows}).")
+    return img
+
+def _encode_image(img: Image.Image, encoding: ImageEncoding, quality: int) -> bytes:
+    output = io.BytesIO()
+    if encoding.format.upper() == "WEBP":
+        img.save(output, "WEBP", quality=quality, method=4)
+    else:
+        img.save(output, "JPEG", quality=quality, optimize=True)
+    return output.getvalue()
+
+def encode_screenshot(img: Image.Image, encoding: ImageEncoding, name: str) -> bytes:
+    """
+    Encode `img` per `encoding`. With a byte target, binary-search the highest quality
+    (between min_quality and quality) whose output fits; if none fits, return the min-quality encoding.
+    """
+    img = _prepare_image(img, encoding, name)
+    data = _encode_image(img, encoding, encoding.quality)
+    if encoding.target_bytes is None or len(data) <= encoding.target_bytes:
+        return data
+    low, high, best = encoding.min_quality, encoding.quality - 1, None
+    while low <= high:
+        quality = (low + high) // 2
+        data = _encode_image(img, encoding, quality)
+        if len(data) <= encoding.target_bytes:
+            best, low = (quality, data), quality + 1
+        else:
+            high = quality - 1
+    if best is None:
+        # The last probe was at min_quality, so `data` is the smallest encoding allowed
+        logger.warning(f"{name} is still {len(data) / 1024:.0f} KB at quality {encoding.min_quality}, "
+                        f"over the {encoding.target_bytes / 1024:.0f} KB target.")
+        return data
+    logger.debug(f"Encoded {name} at quality {best[0]} to fit {encoding.target_bytes / 1024:.0f} KB.")
+    return best[1]
+
+def optimize_screenshot(original_path: Path, optimized_path: Path, max_width: int, jpeg_quality: int) -> bool:
+    logger.info(f"Starting optimization for {original_path.name} to {optimized_path.name}")
+    opt_start_time = time.perf_counter()
+    encoding = ImageEncoding(format="JPEG", max_width=max_width, quality=jpeg_quality, target_bytes=None, max_viewports=None)
+    try:
+        with Image.open(original_path) as img:
+            optimized_path.write_bytes(encode_screenshot(img, encoding, original_path.name))
+            original_size_mb = original_path.stat().st_size / (1024 * 1024)
+            optimized_size_mb = optimized_path.stat().st_size / (1024 * 1024)
+            logger.info(f"Optimized {original_path.name} ({original_size_mb:.2f}MB) -> {optimized_path.name} ({optimized_size_mb:.2f}MB)")
+        original_path.unlink() # Delete the temporary PNG
+        logger.debug(f"Deleted temporary original screenshot: {original_path}")
+        logger.info(f"Optimization for {original_path.name} successful. Took {time.perf_counter() - opt_start_time:.4f}s")
+        return True
+    except Exception as e:
+        logger.error(f"Error optimizing image {original_path}: {e}", exc_info=True)
+        return False
+
+def optimize_screenshot_bytes(png_bytes: bytes, encoding: ImageEncoding, name: str = "screenshot") -> bytes:
+    """In-memory variant of optimize_screenshot: screenshot bytes in, encoded bytes out, nothing touches the disk."""
+    opt_start_time = time.perf_counter()
+    with Image.open(io.BytesIO(png_bytes)) as img:
+        encoded_bytes = encode_screenshot(img, encoding, name)
+    logger.info(f"Optimized {name} in memory ({len(png_bytes) / (1024 * 1024):.2f}MB -> "
+                 f"{len(encoded_bytes) / (1024 * 1024):.2f}MB {encoding.format}). Took {time.perf_counter() - opt_start_time:.4f}s")
+    return encoded_bytes
+
+def measure_screenshot(img: Image.Image, encoding: ImageEncoding, sample_width: int = 256) -> dict:
+    """
+    Screenshot signals for the pre-classifier, measured on a small grayscale copy of the first viewport.
+    `content_width_fraction` is the share of the width between the outermost pixel columns that
+    are not plain page background (the colour of the left edge): a fixed 760px page centred on a
+    1920px viewport scores about 0.4. Content that isn't centred (e.g. left-aligned text on a plain
+    page) and anything with a full-width header or hero scores 1.0.
+    """
+    top = img.crop((0, 0, img.width, min(img.height, encoding.viewport_height)))
+    sample = top.convert("L").resize((sample_width, max(1, top.height * sample_width // img.width)), Image.Resampling.BILINEAR)
+    pixels = sample.tobytes()
+    columns = [pixels[x::sample_width] for x in range(sample_width)]
+    background = columns[0][0]
+    busy = [x for x, column in enumerate(columns)
+            if max(column) - min(column) > 8 or abs(column[0] - background) > 8]
+    if not busy:
+        return {"content_width_fraction": 0.0}
+    left_margin, right_margin = busy[0], sample_width - 1 - busy[-1]
+    if abs(left_margin - right_margin) > sample_width // 10:
+        return {"content_width_fraction": 1.0}
+    return {"content_width_fraction": round((busy[-1] - busy[0] + 1) / sample_width, 3)}
+
+def optimize_and_measure_screenshot(png_bytes: bytes, encoding: ImageEncoding, name: str = "screenshot") -> tuple[bytes, dict]:
+    """optimize_screenshot_bytes() plus measure_screenshot(), decoding the PNG once."""
+    opt_start_time = time.perf_counter()
+    with Image.open(io.BytesIO(png_bytes)) as img:
+        img.load()
+        signals = measure_screenshot(img, encoding)
+        encoded_bytes = encode_screenshot(img, encoding, name)
+    logger.info(f"Optimized and measured {name} in memory ({len(png_bytes) / (1024 * 1024):.2f}MB -> "
+                 f"{len(encoded_bytes) / (1024 * 1024):.2f}MB {encoding.format}). Took {time.perf_counter() - opt_start_time:.4f}s")
+    return encoded_bytes, signals
+
+def image_data_url(base64_image: str) -> str:
+    """data: URL for a base64 screenshot, with the MIME type read from its magic bytes."""
+    mime_type = "image/webp" if base64_image.startswith("UklGR") else "image/jpeg" # base64 of b"RIFF"
+    return f"data:{mime_type};base64,{base64_image}"
+
+def encode_image_to_base64(image_path: Path) -> str:
+    try:
+        with open(image_path, "rb") as image_file:
+            return base64.b64encode(image_file.read()).decode('utf-8')
+    except Exception as e:
+        logger.error(f"Error encoding image {image_path} to base64: {e}", exc_info=True)
+        return ""
@@ -0,0 +1,34 @@
+"""The unit of work that flows through planning, the pipeline and the run outputs."""
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass
+class SiteJob:
+    """One distinct website moving through the capture -> optimize -> analyze pipeline."""
+    index: int
+    url: str
+    title: str
+    base_filepath_name: str
+    raw_screenshot: bytes | None = None # PNG from the browser, dropped once optimized
+    screenshot: bytes | None = None # Optimized JPEG sent to the model
+    screenshot_path: Path | None = None
+    screenshot_saved: Future | None = None # From ScreenshotWriter.write(); True once the file is on disk
+    category: str = "Not Processed"
+    explanation: str = "Not Processed"
+    failed: bool = False
+    timings: dict = field(default_factory=dict)
+    rows: list = field(default_factory=list) # (index, website) of every CSV row sharing this site
+    probe_status: str = "" # Pre-flight outcome: live, redirect, dead or parked
+    settle: dict = field(default_factory=dict) # How the page settled before capture (see SETTLE_SCRIPT)
+    lean: dict | None = None # What a blocking capture profile blocked and saved
+    signals: dict = field(default_factory=dict) # Page and screenshot signals for the pre-classifier
+    metrics: dict = field(default_factory=dict) # Bytes, API retries and cache outcome for the run trace
+    queue_waits: dict = field(default_factory=dict) # Seconds spent waiting in each stage's inbox
+    enqueued_at: float = 0.0 # perf_counter() when the job last entered a queue
+
+    def fail(self, category: str, explanation: str):
+        self.category = category
+        self.explanation = explanation
+        self.failed = True
@@ -0,0 +1,21 @@
+"""Logging setup. The package itself only uses module loggers; the CLI (or an embedding app) decides where they go."""
+import logging
+
+from .config import LOG_FILE
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s"
+
+def configure_logging(log_file: str | None = LOG_FILE, level: int = logging.INFO):
+    """Log to stderr and, if `log_file` is given, append to that file too."""
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.insert(0, logging.FileHandler(log_file, mode='a'))
+    logging.basicConfig(
+        level=level, # Change to logging.DEBUG for more verbose output
+        format=LOG_FORMAT,
+        handlers=handlers,
+    )
+
+def configure_worker_logging(level: int):
+    """ProcessPoolExecutor initializer: spawned optimizer processes log to stderr at the parent's level."""
+    logging.basicConfig(level=level, format=LOG_FORMAT)
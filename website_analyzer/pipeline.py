@@ -0,0 +1,215 @@
+"""The capture -> optimize -> analyze pipeline: bounded queues between per-stage worker pools."""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from .analysis import VALID_CATEGORIES, AsyncAnalysisEngine, lookup_cached_verdict, store_verdict
+from .browser import BrowserPool, CaptureProfile, capture_page
+from .cache import VerdictCache
+from .config import ANALYZE_WORKERS, OPTIMIZE_WORKERS, PIPELINE_QUEUE_SIZE, SCREENSHOTS_DIR
+from .images import ImageEncoding, optimize_and_measure_screenshot, optimize_screenshot_bytes
+from .jobs import SiteJob
+from .preclassify import Preclassifier
+
+logger = logging.getLogger(__name__)
+
+class ScreenshotWriter:
+    """
+    Background thread that writes screenshot bytes to disk so no pipeline stage waits on file I/O.
+    write() returns a Future that resolves to whether the file was written.
+    """
+
+    def __init__(self, max_pending: int = 64):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name="screenshot-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, path: Path, data: bytes) -> Future:
+        future = Future()
+        self._queue.put((path, data, future))
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, data, future = item
+            try:
+                path.write_bytes(data)
+                self.written += 1
+                future.set_result(True)
+            except Exception as e: # Always resolve the future: the run waits on it before journaling the row
+                logger.error(f"Could not write screenshot {path}: {e}")
+                future.set_result(False)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        logger.info(f"Screenshot writer finished ({self.written} files written).")
+
+_STOP = object() # End-of-stream marker passed between pipeline stages
+
+class PipelineStage:
+    """
+    A group of worker threads moving SiteJobs from a bounded inbox to an outbox.
+
+    Failed jobs are passed through untouched so every job reaches the end of the pipeline.
+    When the inbox yields _STOP, the last worker to exit forwards _STOP downstream.
+    """
+
+    def __init__(self, name: str, fn, workers: int, inbox: queue.Queue, outbox: queue.Queue):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self._active = workers
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True) for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Pipeline stage '{self.name}' started with {len(self._threads)} workers")
+
+    def _work(self):
+        while True:
+            job = self.inbox.get()
+            if job is _STOP:
+                self.inbox.put(_STOP) # Let sibling workers see the marker too
+                with self._lock:
+                    self._active -= 1
+                    is_last = self._active == 0
+                if is_last:
+                    self.outbox.put(_STOP)
+                return
+            if not job.failed:
+                stage_start_time = time.perf_counter()
+                job.queue_waits[self.name] = stage_start_time - job.enqueued_at
+                try:
+                    self.fn(job)
+                except Exception as e:
+                    logger.error(f"Stage '{self.name}' failed for {job.url}: {e}", exc_info=True)
+                    job.fail("Error", f"{self.name.capitalize()} stage error: {e}")
+                job.timings[self.name] = time.perf_counter() - stage_start_time
+            job.enqueued_at = time.perf_counter()
+            self.outbox.put(job)
+
+def capture_stage(job: SiteJob, browser_pool: BrowserPool, profile: CaptureProfile | None, signals: bool = False):
+    try:
+        capture = browser_pool.submit(capture_page, job.url, None, profile, signals).result()
+        job.raw_screenshot = capture.png
+        job.settle = capture.settle
+        job.lean = capture.lean
+        job.signals.update(capture.signals or {})
+        job.metrics["png_bytes"] = len(capture.png)
+        if capture.lean:
+            job.metrics["network_bytes"] = capture.lean["bytes_loaded"]
+    except PlaywrightTimeoutError:
+        logger.error(f"Playwright timeout for {job.url}.", exc_info=True)
+        job.fail("Error", "Screenshot/Optimization failed.")
+    except Exception as e:
+        logger.error(f"General error taking screenshot for {job.url}: {e}", exc_info=True)
+        job.fail("Error", "Screenshot/Optimization failed.")
+
+def optimize_stage(job: SiteJob, executor: ProcessPoolExecutor, screenshot_writer: ScreenshotWriter | None,
+                   encoding: ImageEncoding, screenshots_dir: Path = SCREENSHOTS_DIR, measure: bool = False):
+    if measure:
+        future = executor.submit(optimize_and_measure_screenshot, job.raw_screenshot, encoding, job.base_filepath_name)
+    else:
+        future = executor.submit(optimize_screenshot_bytes, job.raw_screenshot, encoding, job.base_filepath_name)
+    job.raw_screenshot = None
+    try:
+        if measure:
+            job.screenshot, image_signals = future.result()
+            job.signals.update(image_signals)
+        else:
+            job.screenshot = future.result()
+    except Exception as e:
+        logger.error(f"Error optimizing screenshot for {job.url}: {e}", exc_info=True)
+        logger.warning(f"No valid screenshot for {job.url}, analysis skipped.")
+        job.fail("Error", "Screenshot/Optimization failed.")
+        return
+    job.screenshot_path = screenshots_dir / f"{job.base_filepath_name}{encoding.extension}"
+    job.metrics["upload_bytes"] = len(job.screenshot)
+    if screenshot_writer:
+        job.screenshot_saved = screenshot_writer.write(job.screenshot_path, job.screenshot)
+
+def analyze_stage(job: SiteJob, engine: AsyncAnalysisEngine, verdict_cache: VerdictCache | None,
+                  preclassifier: Preclassifier | None = None):
+    local = preclassifier.classify(job.signals) if preclassifier else None
+    if local:
+        job.metrics["preclassify_score"] = local.score
+        job.metrics["preclassify"] = "ambiguous" if local.category is None else "audit" if local.audit else "local"
+        if local.category and not local.audit:
+            job.category, job.explanation = local.category, local.explanation
+            job.screenshot = None
+            return
+    # Hashing for the cache is CPU work, so it happens here rather than on the engine's event loop.
+    cache_key, cached = lookup_cached_verdict(verdict_cache, job.screenshot, engine.model_name, job.screenshot_path.name)
+    job.metrics["cache"] = "off" if verdict_cache is None else "hit" if cached else "miss"
+    if cached:
+        job.category, job.explanation = cached
+    else:
+        job.category, job.explanation = engine.classify(job.screenshot, job.screenshot_path.name, job.metrics)
+        store_verdict(verdict_cache, cache_key, engine.model_name, job.category, job.explanation, job.screenshot_path.name)
+    job.screenshot = None
+    if local and local.audit:
+        if job.category in VALID_CATEGORIES:
+            job.metrics["preclassify"] = "agreed" if preclassifier.record_audit(local, job.category) else "disagreed"
+        else: # The model failed, so there is nothing to compare; fall back to the local verdict
+            job.category, job.explanation = local.category, local.explanation
+
+def run_pipeline(jobs: list[SiteJob], browser_pool: BrowserPool, optimize_executor: ProcessPoolExecutor,
+                 engine: AsyncAnalysisEngine, verdict_cache: VerdictCache | None = None,
+                 screenshot_writer: ScreenshotWriter | None = None, capture_profile: CaptureProfile | None = None,
+                 image_encoding: ImageEncoding | None = None, screenshots_dir: Path = SCREENSHOTS_DIR,
+                 preclassifier: Preclassifier | None = None, optimize_workers: int = OPTIMIZE_WORKERS, analyze_workers: int = ANALYZE_WORKERS,
+                 queue_size: int = PIPELINE_QUEUE_SIZE):
+    """
+    Run jobs through capture -> optimize -> analyze and yield each job as it finishes.
+
+    Every stage has its own worker count and the queues between them are bounded, so a slow
+    stage applies backpressure upstream and the slowest stage sets the overall throughput.
+    Capture concurrency is the size of `browser_pool`; OpenRouter concurrency is governed by `engine`. Screenshots stay in memory between
+    stages; they are only written to disk (under `screenshots_dir`), off the critical path, if `screenshot_writer` is given.
+    `image_encoding` (default: ImageEncoding()) controls the format and size of what is uploaded.
+    With a `preclassifier`, page and screenshot signals are collected on the way and obviously dated
+    sites are settled before they reach the verdict cache or `engine`.
+    """
+    image_encoding = image_encoding or ImageEncoding()
+    measure = preclassifier is not None
+    capture_queue = queue.Queue(maxsize=queue_size)
+    optimize_queue = queue.Queue(maxsize=queue_size)
+    analyze_queue = queue.Queue(maxsize=queue_size)
+    results_queue = queue.Queue() # Drained by the caller, so never blocks the last stage
+
+    stages = [
+        PipelineStage("capture", lambda job: capture_stage(job, browser_pool, capture_profile, signals=measure), browser_pool.size, capture_queue, optimize_queue),
+        PipelineStage("optimize", lambda job: optimize_stage(job, optimize_executor, screenshot_writer, image_encoding, screenshots_dir, measure), optimize_workers, optimize_queue, analyze_queue),
+        PipelineStage("analyze", lambda job: analyze_stage(job, engine, verdict_cache, preclassifier), analyze_workers, analyze_queue, results_queue),
+    ]
+    for stage in stages:
+        stage.start()
+
+    def feed():
+        for job in jobs:
+            job.enqueued_at = time.perf_counter()
+            capture_queue.put(job)
+        capture_queue.put(_STOP)
+
+    threading.Thread(target=feed, name="pipeline-feeder", daemon=True).start()
+
+    while True:
+        job = results_queue.get()
+        if job is _STOP:
+            return
+        yield job
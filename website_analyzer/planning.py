@@ -0,0 +1,144 @@
+"""Turning CSV rows into SiteJobs: the async pre-flight probe and grouping rows by canonical URL."""
+import asyncio
+import logging
+import re
+import time
+import urllib.parse
+from dataclasses import dataclass
+
+import aiohttp
+
+from .config import (BROWSER_USER_AGENT, PROBE_CONCURRENCY, PROBE_CONCURRENCY_PER_HOST, PROBE_CONNECT_TIMEOUT_SECONDS,
+                     PROBE_DNS_CACHE_TTL_SECONDS, PROBE_MAX_BODY_BYTES, PROBE_TIMEOUT_SECONDS)
+from .jobs import SiteJob
+from .urls import canonical_url_key, screenshot_filename
+
+logger = logging.getLogger(__name__)
+
+PARKED_PAGE_PATTERN = re.compile(
+    r"domain (is|may be) for sale|buy this domain|this domain is parked|this web ?page is parked|parked free"
+    r"|domain parking|sedoparking|parkingcrew|bodis\.com|hugedomains|afternic|dan\.com/buy-domain",
+    re.IGNORECASE,
+)
+PARKING_HOSTS = ("sedoparking.com", "parkingcrew.net", "bodis.com", "hugedomains.com", "afternic.com", "dan.com", "above.com")
+PROBE_LIVE_ERROR_STATUSES = {401, 403, 429, 503} # Often bot protection in front of a real site; let the browser try
+
+@dataclass
+class ProbeResult:
+    """Outcome of the pre-flight probe for one URL: 'live', 'redirect', 'dead' or 'parked'."""
+    status: str
+    final_url: str
+    http_status: int | None = None
+    detail: str = ""
+    elapsed: float = 0.0
+
+    @property
+    def capturable(self) -> bool:
+        return self.status in ("live", "redirect")
+
+async def probe_url(session: aiohttp.ClientSession, url: str) -> ProbeResult:
+    """GET `url` with short timeouts, following redirects and reading at most PROBE_MAX_BODY_BYTES of the body."""
+    probe_start_time = time.perf_counter()
+    try:
+        async with session.get(url, allow_redirects=True, max_redirects=10) as response:
+            body = b""
+            while len(body) < PROBE_MAX_BODY_BYTES: # read() returns whatever chunk has arrived, not n bytes
+                chunk = await response.content.read(PROBE_MAX_BODY_BYTES - len(body))
+                if not chunk:
+                    break
+                body += chunk
+            final_url = str(response.url)
+            http_status = response.status
+    except (aiohttp.ClientSSLError, aiohttp.ClientConnectorCertificateError) as e:
+        return ProbeResult("dead", url, detail=f"TLS error: {e}", elapsed=time.perf_counter() - probe_start_time)
+    except aiohttp.ClientConnectorError as e:
+        return ProbeResult("dead", url, detail=f"DNS/connection error: {e}", elapsed=time.perf_counter() - probe_start_time)
+    except asyncio.TimeoutError:
+        return ProbeResult("dead", url, detail=f"No response within {PROBE_TIMEOUT_SECONDS}s",
+                           elapsed=time.perf_counter() - probe_start_time)
+    except Exception as e:
+        return ProbeResult("dead", url, detail=f"{type(e).__name__}: {e}", elapsed=time.perf_counter() - probe_start_time)
+
+    elapsed = time.perf_counter() - probe_start_time
+    if http_status >= 400 and http_status not in PROBE_LIVE_ERROR_STATUSES:
+        return ProbeResult("dead", final_url, http_status, f"HTTP {http_status}", elapsed)
+    final_host = (urllib.parse.urlsplit(final_url).hostname or "").lower()
+    text = body.decode("utf-8", errors="ignore")
+    if final_host.endswith(PARKING_HOSTS) or PARKED_PAGE_PATTERN.search(text):
+        return ProbeResult("parked", final_url, http_status, "Parked or for-sale domain page", elapsed)
+    if canonical_url_key(final_url).split("/")[0] != canonical_url_key(url).split("/")[0]:
+        return ProbeResult("redirect", final_url, http_status, f"Redirects to {final_host}", elapsed)
+    return ProbeResult("live", final_url, http_status, "", elapsed)
+
+async def probe_urls(urls: list[str], concurrency: int = PROBE_CONCURRENCY) -> dict[str, ProbeResult]:
+    """
+    Probe many URLs over one pooled, DNS-caching connector, at most `concurrency` at a time
+    and PROBE_CONCURRENCY_PER_HOST per host.
+
+    aiohttp counts the wait for a free pooled connection against the request's timeouts, so
+    probes wait on semaphores instead: a URL's timeouts only start once it holds a connection slot.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    host_semaphores = {}
+
+    async def bounded_probe(session: aiohttp.ClientSession, url: str) -> ProbeResult:
+        host = (urllib.parse.urlsplit(url).hostname or "").lower()
+        host_semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(PROBE_CONCURRENCY_PER_HOST))
+        async with host_semaphore, semaphore: # Per host first, so a busy host doesn't hold global slots
+            return await probe_url(session, url)
+
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=PROBE_CONCURRENCY_PER_HOST, use_dns_cache=True,
+                                     ttl_dns_cache=PROBE_DNS_CACHE_TTL_SECONDS)
+    timeout = aiohttp.ClientTimeout(total=PROBE_TIMEOUT_SECONDS, sock_connect=PROBE_CONNECT_TIMEOUT_SECONDS)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     headers={"User-Agent": BROWSER_USER_AGENT}) as session:
+        results = await asyncio.gather(*(bounded_probe(session, url) for url in urls))
+    return dict(zip(urls, results))
+
+def plan_site_jobs(rows: list[tuple], preflight: bool = True) -> list[SiteJob]:
+    """
+    Turn (index, website_url, title) rows into one SiteJob per distinct site.
+
+    With `preflight`, every distinct URL is probed first: redirects are followed so aliases
+    of a site group together, and dead or parked sites come back as already-failed jobs that
+    never reach the browser. Rows are grouped by canonical_url_key() of the final URL; each
+    group is captured and analyzed once and its verdict fanned out to every row in
+    `SiteJob.rows`. Screenshot files are named after the canonical key.
+    """
+    plan_start_time = time.perf_counter()
+    probes = {}
+    if preflight:
+        distinct_urls = list(dict.fromkeys(url.strip() for _, url, _ in rows))
+        probes = asyncio.run(probe_urls(distinct_urls))
+        outcome_counts = {}
+        for result in probes.values():
+            outcome_counts[result.status] = outcome_counts.get(result.status, 0) + 1
+        logger.info(f"Pre-flight probe of {len(distinct_urls)} URLs took {time.perf_counter() - plan_start_time:.2f}s: "
+                     + ", ".join(f"{count} {status}" for status, count in sorted(outcome_counts.items())))
+
+    groups = {}
+    for index, website_url, business_title in rows:
+        probe = probes.get(website_url.strip())
+        capture_url = probe.final_url if probe else website_url.strip()
+        groups.setdefault(canonical_url_key(capture_url), []).append((index, website_url, business_title, probe))
+
+    jobs = []
+    for key, members in groups.items():
+        index, website_url, business_title, probe = members[0]
+        # Variants of one site (http://, https://www.) can probe differently: capture the first
+        # live one, and settle the group as dead or parked only when every variant failed
+        probe = next((member[3] for member in members if member[3] and member[3].capturable), probe)
+        job = SiteJob(index, probe.final_url if probe else website_url.strip(), business_title, screenshot_filename(key))
+        if probe:
+            job.probe_status = probe.status
+            job.timings["probe"] = probe.elapsed
+            if probe.status == "dead":
+                job.fail("Dead Site", f"Pre-flight probe: {probe.detail}")
+            elif probe.status == "parked":
+                job.fail("Parked Domain", f"Pre-flight probe: {probe.detail}")
+        job.rows.extend((member[0], member[1]) for member in members)
+        jobs.append(job)
+
+    logger.info(f"Planned {len(jobs)} distinct sites for {len(rows)} rows "
+                 f"({len(rows) - len(jobs)} duplicates folded) in {time.perf_counter() - plan_start_time:.2f}s")
+    return jobs
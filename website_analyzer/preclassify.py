@@ -0,0 +1,121 @@
+"""
+Local pre-classification: call obviously dated sites 'Outdated' from page signals, without an API call.
+
+Signals come from capture (browser.PAGE_SIGNALS_SCRIPT: legacy markup, copyright year, viewport meta,
+flex/grid usage) and from the optimize stage (images.measure_screenshot: how much of the viewport
+width the content spans). Each dated signal adds evidence, each modern one subtracts; only sites
+with a high score backed by several independent signals are settled locally. Markup can prove a
+site is old but not that it looks good, so nothing is ever called Modern or Acceptable here.
+"""
+import datetime
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+
+from .config import PRECLASSIFY_AUDIT_EVERY, PRECLASSIFY_MIN_SIGNALS, PRECLASSIFY_OUTDATED_SCORE
+
+logger = logging.getLogger(__name__)
+
+DATED_GENERATORS = re.compile(r"frontpage|dreamweaver|iweb|microsoft word|publisher|netobjects|homestead", re.IGNORECASE)
+
+@dataclass
+class Preclassification:
+    """The pre-classifier's reading of one site. `category` is None when the site is left to the model."""
+    score: float
+    reasons: list = field(default_factory=list) # Dated signals that contributed, e.g. "Flash content"
+    category: str | None = None
+    audit: bool = False # Also ask the model, to measure agreement; the model's verdict is then kept
+
+    @property
+    def explanation(self) -> str:
+        return f"Classified locally from page signals as dated: {', '.join(self.reasons)}."
+
+def score_signals(signals: dict, current_year: int | None = None) -> Preclassification:
+    """Weigh the capture and screenshot signals of one site. Missing signals count as neither dated nor modern."""
+    current_year = current_year or datetime.date.today().year
+    score, reasons = 0.0, []
+
+    def dated(weight: float, reason: str):
+        nonlocal score
+        score += weight
+        reasons.append(reason)
+
+    if signals.get("flash"):
+        dated(3, "Flash content")
+    if signals.get("frames"):
+        dated(3, "frameset layout")
+    if signals.get("marquee"):
+        dated(2, "marquee/blink text")
+    if signals.get("nested_tables", 0) >= 2:
+        dated(2, "table-based layout")
+    if signals.get("font_tags", 0) >= 3:
+        dated(1.5, "<font>/<center> styling")
+    if signals.get("spacer_images", 0) >= 2:
+        dated(1.5, "spacer images")
+    if signals.get("viewport_meta") is False:
+        dated(1.5, "no mobile viewport")
+    if DATED_GENERATORS.search(signals.get("generator") or ""):
+        dated(2, f"built with {signals['generator']}")
+    copyright_year = signals.get("copyright_year")
+    if copyright_year and copyright_year <= current_year - 10:
+        dated(2, f"copyright {copyright_year}")
+    elif copyright_year and copyright_year <= current_year - 5:
+        dated(1, f"copyright {copyright_year}")
+    content_width = signals.get("content_width_fraction")
+    if content_width is not None and content_width < 0.5:
+        dated(2, f"fixed-width page using {content_width:.0%} of the viewport")
+
+    # Counter-evidence lowers the score without adding a reason
+    if signals.get("viewport_meta") and signals.get("flex_grid", 0) >= 20:
+        score -= 2
+    if signals.get("web_fonts", 0) >= 1:
+        score -= 1
+    if copyright_year and copyright_year >= current_year - 1:
+        score -= 1.5
+    return Preclassification(round(score, 2), reasons)
+
+class Preclassifier:
+    """
+    Settles high-confidence 'Outdated' sites locally and leaves the rest to the model.
+
+    Every `audit_every`-th local verdict is still sent to the model (whose verdict is kept), so
+    the run measures how often the local call agrees; stats() reports the agreement rate.
+    Thread-safe: the pipeline's analyze workers share one instance.
+    """
+
+    def __init__(self, outdated_score: float = PRECLASSIFY_OUTDATED_SCORE, min_signals: int = PRECLASSIFY_MIN_SIGNALS,
+                 audit_every: int = PRECLASSIFY_AUDIT_EVERY):
+        self.outdated_score = outdated_score
+        self.min_signals = min_signals
+        self.audit_every = audit_every
+        self._lock = threading.Lock()
+        self._counts = {"local": 0, "ambiguous": 0, "audited": 0, "compared": 0, "agreed": 0}
+
+    def classify(self, signals: dict) -> Preclassification:
+        result = score_signals(signals)
+        confident = result.score >= self.outdated_score and len(result.reasons) >= self.min_signals
+        result.category = "Outdated" if confident else None
+        with self._lock:
+            self._counts["local" if confident else "ambiguous"] += 1
+            result.audit = confident and bool(self.audit_every) and (self._counts["local"] - 1) % self.audit_every == 0
+            self._counts["audited"] += result.audit
+        return result
+
+    def record_audit(self, local: Preclassification, model_category: str) -> bool:
+        """Compare an audited local verdict with the model's (a valid category, not an error)."""
+        agreed = model_category == local.category
+        with self._lock:
+            self._counts["compared"] += 1
+            self._counts["agreed"] += agreed
+        if not agreed:
+            logger.info(f"Pre-classifier disagreed with the model: local {local.category} (score {local.score}: "
+                        f"{', '.join(local.reasons)}), model {model_category}")
+        return agreed
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counts)
+        stats["api_calls_saved"] = stats["local"] - stats["audited"]
+        stats["agreement_rate"] = stats["agreed"] / stats["compared"] if stats["compared"] else None
+        return stats
@@ -0,0 +1,235 @@
+"""Run outputs: the resumable results journal and the per-site trace / run summary."""
+import json
+import logging
+import math
+import os
+import time
+from pathlib import Path
+
+from .config import TRACE_HISTOGRAM_BUCKETS_SECONDS
+from .jobs import SiteJob
+
+logger = logging.getLogger(__name__)
+
+RESULT_COLUMNS = ['screenshot_path', 'aesthetic_category', 'aesthetic_explanation']
+
+class ResultsJournal:
+    """
+    Append-only JSONL journal of finished rows, flushed and fsynced per row.
+
+    A crash or Ctrl-C loses at most the rows still in flight. Records are keyed on
+    (row index, website) so a resumed run only skips rows whose URL is unchanged.
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = Path(path)
+        self.records = {}
+        if resume and self.path.exists():
+            self.records = self.read_records(self.path)
+            logger.info(f"Resuming: {len(self.records)} finished rows found in journal {self.path}")
+        elif self.path.exists():
+            logger.info(f"Starting a fresh journal at {self.path} (use --resume to continue the previous run)")
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    @classmethod
+    def read_records(cls, path: Path) -> dict:
+        """Finished rows in the journal at `path`, keyed on (row index, website)."""
+        records = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                    records[cls._key(record['index'], record['website'])] = record
+                except (json.JSONDecodeError, KeyError):
+                    # A torn final line is expected after a hard crash; that row is simply redone.
+                    logger.warning(f"Ignoring unreadable journal line {line_number} in {path}")
+        return records
+
+    @staticmethod
+    def _key(index, website_url) -> tuple:
+        return index, website_url if isinstance(website_url, str) else None
+
+    def is_done(self, index, website_url) -> bool:
+        return self._key(index, website_url) in self.records
+
+    def append(self, index, website_url, screenshot_path: str, category: str, explanation: str):
+        record = {
+            'index': index,
+            'website': website_url if isinstance(website_url, str) else None,
+            'screenshot_path': screenshot_path,
+            'aesthetic_category': category,
+            'aesthetic_explanation': explanation,
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.records[self._key(index, website_url)] = record
+
+    def merge_into(self, df):
+        """Write every journaled result into the (pandas) DataFrame's result columns in one bulk assignment per column."""
+        if not self.records:
+            return
+        import pandas as pd # Only needed once a run is done, so not at import time
+        results = pd.DataFrame.from_records(list(self.records.values())).set_index('index')
+        results = results[results.index.isin(df.index) & ~results.index.duplicated(keep='last')]
+        for column in RESULT_COLUMNS:
+            df.loc[results.index, column] = results[column]
+
+    def close(self):
+        self._file.close()
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(len(ordered) * pct / 100)) - 1]
+
+class RunTracer:
+    """
+    Structured instrumentation for a run: one JSONL span per site plus aggregate stage metrics.
+
+    `record()` is called for every finished SiteJob (including ones settled before capture). At the
+    end, `summary()` reports per-stage latency percentiles and cumulative histograms, queue waits and
+    utilization (busy time / (workers x wall time)); the most utilized stage is what bound the run.
+    `write_prometheus()` writes the same numbers in the node_exporter textfile format.
+    """
+
+    def __init__(self, path: Path | None, stage_workers: dict[str, int], append: bool = False,
+                 buckets: tuple = TRACE_HISTOGRAM_BUCKETS_SECONDS):
+        self.stage_workers = stage_workers
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._start_time = time.perf_counter()
+        self._stage_seconds = {}
+        self._queue_waits = {}
+        self._counters = {}
+        self._file = open(path, "a" if append else "w", encoding="utf-8") if path else None
+
+    def _bump(self, group: str, key: str, amount: float = 1):
+        counts = self._counters.setdefault(group, {})
+        counts[key] = counts.get(key, 0) + amount
+
+    def record(self, job: SiteJob):
+        for name, seconds in job.timings.items():
+            self._stage_seconds.setdefault(name, []).append(seconds)
+        for name, seconds in job.queue_waits.items():
+            self._queue_waits.setdefault(name, []).append(seconds)
+        self._bump("sites", job.category)
+        self._bump("rows", job.category, len(job.rows))
+        if job.probe_status:
+            self._bump("probe", job.probe_status)
+        if "cache" in job.metrics:
+            self._bump("cache", job.metrics["cache"])
+        if "preclassify" in job.metrics:
+            self._bump("preclassify", job.metrics["preclassify"])
+        for key in ("api_calls", "retries", "throttled", "api_seconds"):
+            if key in job.metrics:
+                self._bump("api", key, job.metrics[key])
+        for key in ("network_bytes", "png_bytes", "upload_bytes"):
+            if key in job.metrics:
+                self._bump("bytes", key, job.metrics[key])
+        if job.settle:
+            self._bump("settled_by", job.settle.get("ended_by", "unknown"))
+        if self._file:
+            span = {
+                "url": job.url,
+                "rows": len(job.rows),
+                "category": job.category,
+                "failed": job.failed,
+                "probe": job.probe_status or None,
+                "stages": {name: round(seconds, 4) for name, seconds in job.timings.items()},
+                "queue_waits": {name: round(seconds, 4) for name, seconds in job.queue_waits.items()},
+                "settled_by": job.settle.get("ended_by") if job.settle else None,
+                "blocked": job.lean["blocked"] if job.lean else None,
+                "signals": job.signals or None,
+                **{key: round(value, 4) if isinstance(value, float) else value for key, value in job.metrics.items()},
+                "finished_at": round(time.time(), 3),
+            }
+            self._file.write(json.dumps(span, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def summary(self) -> dict:
+        wall_seconds = time.perf_counter() - self._start_time
+        stages = {}
+        for name, values in self._stage_seconds.items():
+            stage = {
+                "count": len(values),
+                "sum_seconds": round(sum(values), 3),
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3),
+                "p99": round(percentile(values, 99), 3),
+                "max": round(max(values), 3),
+                "histogram": {str(bound): sum(1 for value in values if value <= bound) for bound in self.buckets},
+            }
+            waits = self._queue_waits.get(name)
+            if waits:
+                stage["queue_wait_p50"] = round(percentile(waits, 50), 3)
+                stage["queue_wait_p95"] = round(percentile(waits, 95), 3)
+            if name in self.stage_workers and wall_seconds > 0:
+                stage["workers"] = self.stage_workers[name]
+                stage["utilization"] = round(sum(values) / (self.stage_workers[name] * wall_seconds), 3)
+            stages[name] = stage
+        utilized = {name: stage["utilization"] for name, stage in stages.items() if "utilization" in stage}
+        sites = sum(self._counters.get("sites", {}).values())
+        return {
+            "started_at": round(self.started_at, 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "sites": sites,
+            "sites_per_second": round(sites / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+            **{group: {key: round(value, 3) if isinstance(value, float) else value for key, value in counts.items()}
+               for group, counts in self._counters.items()},
+            "stages": stages,
+            "bound_by": max(utilized, key=utilized.get) if utilized else None,
+        }
+
+    def write_summary(self, path: Path) -> dict:
+        summary = self.summary()
+        Path(path).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+        return summary
+
+    def write_prometheus(self, path: Path, summary: dict | None = None):
+        """Write the run's metrics as a node_exporter textfile, atomically so a scrape never sees half a file."""
+        summary = summary or self.summary()
+        lines = [
+            "# HELP website_analyzer_stage_seconds Seconds one site spent in a pipeline stage.",
+            "# TYPE website_analyzer_stage_seconds histogram",
+        ]
+        for name, values in self._stage_seconds.items():
+            for bound in self.buckets:
+                lines.append(f'website_analyzer_stage_seconds_bucket{{stage="{name}",le="{bound}"}} '
+                             f'{sum(1 for value in values if value <= bound)}')
+            lines.append(f'website_analyzer_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {len(values)}')
+            lines.append(f'website_analyzer_stage_seconds_sum{{stage="{name}"}} {sum(values):.6f}')
+            lines.append(f'website_analyzer_stage_seconds_count{{stage="{name}"}} {len(values)}')
+        lines += ["# HELP website_analyzer_stage_utilization Stage busy time divided by workers x run wall time.",
+                  "# TYPE website_analyzer_stage_utilization gauge"]
+        for name, stage in summary["stages"].items():
+            if "utilization" in stage:
+                lines.append(f'website_analyzer_stage_utilization{{stage="{name}"}} {stage["utilization"]}')
+        lines += ["# HELP website_analyzer_sites_total Sites finished in the run, by category.",
+                  "# TYPE website_analyzer_sites_total counter"]
+        for category, count in self._counters.get("sites", {}).items():
+            lines.append(f'website_analyzer_sites_total{{category="{category}"}} {count}')
+        lines += ["# HELP website_analyzer_api_total OpenRouter calls, retries and 429s in the run.",
+                  "# TYPE website_analyzer_api_total counter"]
+        for key in ("api_calls", "retries", "throttled"):
+            lines.append(f'website_analyzer_api_total{{kind="{key}"}} {self._counters.get("api", {}).get(key, 0)}')
+        lines += ["# HELP website_analyzer_bytes_total Bytes loaded by the browser, captured and uploaded.",
+                  "# TYPE website_analyzer_bytes_total counter"]
+        for key, value in self._counters.get("bytes", {}).items():
+            lines.append(f'website_analyzer_bytes_total{{kind="{key.removesuffix("_bytes")}"}} {value}')
+        lines += ["# HELP website_analyzer_run_seconds Wall time of the run.",
+                  "# TYPE website_analyzer_run_seconds gauge",
+                  f"website_analyzer_run_seconds {summary['wall_seconds']}",
+                  "# HELP website_analyzer_last_run_timestamp_seconds When the run started.",
+                  "# TYPE website_analyzer_last_run_timestamp_seconds gauge",
+                  f"website_analyzer_last_run_timestamp_seconds {summary['started_at']}"]
+        path = Path(path)
+        temp_path = path.with_name(f".{path.name}.tmp")
+        temp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(temp_path, path)
+
+    def close(self):
+        if self._file:
+            self._file.close()
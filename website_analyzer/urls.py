@@ -0,0 +1,39 @@
+"""URL helpers that need nothing beyond the standard library (so dry runs stay fast)."""
+import hashlib
+import re
+import urllib.parse
+
+def sanitize_filename(url_or_name: str) -> str:
+    s = str(url_or_name)
+    s = s.replace("http://", "").replace("https://", "").replace("www.", "")
+    s = re.sub(r'[^\w\.-]', '_', s)
+    return s[:100]
+
+def screenshot_filename(key: str) -> str:
+    """File stem for a site's screenshot: readable prefix plus a short hash, so long keys that differ past the prefix don't collide."""
+    return f"{sanitize_filename(key)[:80]}_{hashlib.sha256(key.encode('utf-8')).hexdigest()[:10]}"
+
+TRACKING_QUERY_PARAMS = {"gclid", "fbclid", "msclkid", "yclid", "y_source", "mc_cid", "mc_eid", "_ga", "ref", "source"}
+
+def canonical_url_key(url: str) -> str:
+    """
+    Scheme-less canonical form used to group rows that point at the same site.
+
+    Lowercases the host, drops 'www.', default ports, fragments, tracking parameters
+    (utm_*, gclid, ...) and trailing slashes, and sorts what is left of the query.
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    host = (parts.hostname or "").lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+    query = sorted(
+        (name, value) for name, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_") and name.lower() not in TRACKING_QUERY_PARAMS
+    )
+    key = host + path
+    if query:
+        key += "?" + urllib.parse.urlencode(query)
+    return key